@@ -1,17 +1,25 @@
 import re
 import json
+import time
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Union, Any
 from dataclasses import dataclass
 from enum import Enum
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 
 from keyword_lists import KEYWORDS, CATEGORY_MAPPING, SUBCATEGORY_MAPPING
+from keyword_matcher import (KeywordIndex, KeywordOverlay, KeywordStream, load_keyword_index,
+                             get_keyword_overlay, content_hash)
+from keyword_watcher import KeywordFileWatcher
+from memo_cache import MemoCache, text_key
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE = re.compile(r'\s+')
+
 class ActivityCategory(Enum):
     WORK = "Рабочая активность"
     NON_WORK = "Нерабочая активность"
@@ -19,18 +27,105 @@ class ActivityCategory(Enum):
     NEUTRAL = "Нейтральная / Системная активность"
     UNKNOWN = "Неизвестная активность"
 
-@dataclass
+_CATEGORIES = list(ActivityCategory)
+
 class ClassificationResult:
-    category: ActivityCategory
-    subcategory: str
-    confidence: float
-    matched_keywords: List[str]
-    detected_apps: List[str]
-    text_summary: str
-    timestamp: datetime
-    classifier_type: str = "keyword"
-    transformer_confidence: float = 0.0
-    keyword_confidence: float = 0.0
+    # Компактный результат: категория хранится номером в ActivityCategory, время - числом
+    # (time.time()), краткое содержание вычисляется из начала исходного текста при обращении
+    __slots__ = ('category_id', 'subcategory', 'confidence', 'matched_keywords', 'detected_apps',
+                 '_text', '_text_summary', '_timestamp', 'classifier_type',
+                 'transformer_confidence', 'keyword_confidence')
+    
+    SUMMARY_LENGTH = 500
+    _FIELD_NAMES = ('category', 'subcategory', 'confidence', 'matched_keywords', 'detected_apps',
+                    'text_summary', 'timestamp', 'classifier_type', 'transformer_confidence',
+                    'keyword_confidence')
+    
+    def __init__(self, category: ActivityCategory, subcategory: str, confidence: float,
+                 matched_keywords: List[str], detected_apps: List[str],
+                 text_summary: Optional[str] = None, timestamp: Union[datetime, float, None] = None,
+                 classifier_type: str = "keyword", transformer_confidence: float = 0.0,
+                 keyword_confidence: float = 0.0, text: Optional[str] = None):
+        # text - исходный текст, из которого строится text_summary (вместо готового text_summary).
+        # Хранится только начало текста на один символ длиннее краткого содержания:
+        # этого достаточно, чтобы решить, нужно ли многоточие
+        self.category = category
+        self.subcategory = subcategory
+        self.confidence = confidence
+        self.matched_keywords = matched_keywords
+        self.detected_apps = detected_apps
+        self._text = self._summary_source(text)
+        self._text_summary = text_summary
+        self.timestamp = timestamp
+        self.classifier_type = classifier_type
+        self.transformer_confidence = transformer_confidence
+        self.keyword_confidence = keyword_confidence
+    
+    @property
+    def category(self) -> ActivityCategory:
+        return _CATEGORIES[self.category_id]
+    
+    @category.setter
+    def category(self, category: ActivityCategory) -> None:
+        self.category_id = _CATEGORIES.index(category)
+    
+    @property
+    def text_summary(self) -> str:
+        if self._text_summary is None:
+            text = self._text or ''
+            self._text_summary = text[:self.SUMMARY_LENGTH] + ('...' if len(text) > self.SUMMARY_LENGTH else '')
+            self._text = None
+        return self._text_summary
+    
+    @text_summary.setter
+    def text_summary(self, text_summary: str) -> None:
+        self._text_summary = text_summary
+        self._text = None
+    
+    @classmethod
+    def _summary_source(cls, text: Optional[str]) -> Optional[str]:
+        return text[:cls.SUMMARY_LENGTH + 1] if text is not None else None
+    
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self._timestamp)
+    
+    @timestamp.setter
+    def timestamp(self, timestamp: Union[datetime, float, None]) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        elif isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        self._timestamp = timestamp
+    
+    @property
+    def timestamp_seconds(self) -> float:
+        return self._timestamp
+    
+    def copy(self, **changes) -> 'ClassificationResult':
+        # Аналог dataclasses.replace: копия с измененными полями
+        result = ClassificationResult.__new__(ClassificationResult)
+        for name in self.__slots__:
+            setattr(result, name, getattr(self, name))
+        for name, value in changes.items():
+            if name == 'text':
+                result._text = self._summary_source(value)
+                result._text_summary = None
+            else:
+                setattr(result, name, value)
+        return result
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ClassificationResult):
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={value!r}" for name, value in zip(self._FIELD_NAMES, self._fields()))
+        return f"ClassificationResult({fields})"
+    
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._FIELD_NAMES)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -43,11 +138,46 @@ class ClassificationResult:
             'timestamp': self.timestamp.isoformat()
         }
 
+@dataclass
+class BatchClassificationResult:
+    # Результаты классификации пакета текстов по столбцам.
+    # confidences[i, j] - уверенность текста i в категории categories[j];
+    # category_ids - индекс в list(ActivityCategory), UNKNOWN - последний;
+    # subcategory_ids - индекс в subcategories или -1, если подкатегория не определена
+    categories: List[ActivityCategory]
+    subcategories: List[Tuple[str, str]]
+    confidences: np.ndarray
+    category_ids: np.ndarray
+    best_confidences: np.ndarray
+    subcategory_ids: np.ndarray
+    sufficient_text: np.ndarray
+    timestamp: datetime
+    matched_keywords: Optional[List[List[str]]] = None
+    
+    def __len__(self) -> int:
+        return len(self.category_ids)
+    
+    def category(self, index: int) -> ActivityCategory:
+        return list(ActivityCategory)[self.category_ids[index]]
+
 class ActivityClassifier:
     
-    def __init__(self, keywords: Optional[Dict] = None):
-        self.keywords = keywords or KEYWORDS
-        self.compiled_patterns = self._compile_keyword_patterns()
+    def __init__(self, keywords: Optional[Dict] = None, keywords_file: Optional[str] = None,
+                 memo_cache: Optional[MemoCache] = None, stream_long_texts: bool = False):
+        # keywords_file - JSON, из которого перечитываются ключевые слова (reload_keywords)
+        # memo_cache - кэш найденных ключевых слов по нормализованному тексту (None - отключен)
+        # stream_long_texts - classify переходит в потоковый режим с досрочной остановкой
+        # для текстов от stream_min_length символов (уверенность тогда считается по части текста)
+        self.keywords_file = keywords_file
+        self.memo_cache = memo_cache
+        self.stream_long_texts = stream_long_texts
+        self.keyword_index = self._build_keyword_index(keywords or KEYWORDS)
+        self._reload_lock = threading.Lock()
+        
+        # Профили подразделений поверх общего индекса: tenant_id -> {'add': ..., 'remove': ...}
+        self.tenant_profiles: Dict[str, Dict[str, Dict]] = {}
+        self.tenant_overlays: Dict[str, KeywordOverlay] = {}
+        self._watcher: Optional[KeywordFileWatcher] = None
         
         # Веса категорий для расчета уверенности
         self.category_weights = {
@@ -62,49 +192,101 @@ class ActivityClassifier:
         self.thresholds = {
             'min_confidence': 0.2,
             'min_keywords': 1,
-            'text_length_factor': 0.05
+            'text_length_factor': 0.05,
+            # Потоковый режим для длинных текстов (classify_stream): размер части, символов;
+            # длина текста, с которой classify переходит в потоковый режим (при stream_long_texts);
+            # досрочная остановка, когда найдено не меньше stream_min_matches ключевых слов
+            # и взвешенное число совпадений лидирующей категории в stream_lead_ratio раз больше второй
+            'stream_chunk_size': 4096,
+            'stream_min_length': 20000,
+            'stream_min_matches': 20,
+            'stream_lead_ratio': 3.0
         }
         
-    def _compile_keyword_patterns(self) -> Dict[str, Dict[str, re.Pattern]]:
-        patterns = {}
-        
-        for category, subcategories in self.keywords.items():
-            patterns[category] = {}
-            for subcategory, keywords in subcategories.items():
-                # Создаем паттерн для поиска ключевых слов
-                # Используем границы слов для точного соответствия
-                keyword_patterns = []
-                for keyword in keywords:
-                    # Экранируем специальные символы
-                    escaped = re.escape(keyword.lower())
-                    # Для ключей с точкой в конце ищем как начало слова
-                    if keyword.endswith('.'):
-                        pattern = fr'\b{escaped}\w*'
-                    else:
-                        if ' ' in keyword:
-                            words = escaped.split()
-                            full_phrase_pattern = r'\b' + escaped + r'\b'
-                            keyword_patterns.append(full_phrase_pattern)
-
-                            significant_words = [word for word in words if len(word) > 3]
-                            for word in significant_words:
-                                keyword_patterns.append(r'\b' + word + r'\b')
-                        else:
-                            pattern = r'\b' + escaped + r'\b'
-                            keyword_patterns.append(pattern)
-                
-                # Объединяем все паттерны через ИЛИ
-                unique_patterns = list(set(keyword_patterns))
-                combined_pattern = '|'.join(unique_patterns)
-                
-                patterns[category][subcategory] = re.compile(
-                    combined_pattern, 
-                    re.IGNORECASE | re.UNICODE
-                )
+    @property
+    def keywords(self) -> Dict:
+        return self.keyword_index.keywords
+    
+    def _build_keyword_index(self, keywords: Dict, previous: Optional[KeywordIndex] = None) -> KeywordIndex:
+        # Один индекс на все категории: текст просматривается один раз,
+        # каждое совпадение относится к своим подкатегориям.
+        # Индекс сохраняется на диск по хешу содержимого ключевых слов
+        return load_keyword_index(keywords, previous)
+    
+    def reload_keywords(self, keywords_file: Optional[str] = None) -> bool:
+        # Перечитывает JSON с ключевыми словами и подменяет индекс. Пересобираются только
+        # изменившиеся подкатегории; классификации, уже начатые со старым индексом,
+        # дорабатывают с ним. Возвращает True, если индекс заменен
+        keywords_file = keywords_file or self.keywords_file
+        if not keywords_file:
+            raise ValueError("Не задан файл ключевых слов")
+        
+        with self._reload_lock:
+            try:
+                with open(keywords_file, 'r', encoding='utf-8') as f:
+                    keywords = json.load(f)
+            except Exception as e:
+                logger.error(f"Не удалось прочитать ключевые слова из {keywords_file}: {e}")
+                return False
+            
+            if content_hash(keywords) == self.keyword_index.content_hash:
+                return False
+            
+            previous = self.keyword_index
+            index = self._build_keyword_index(keywords, previous)
+            overlays = {tenant_id: get_keyword_overlay(index, profile['add'], profile['remove'])
+                        for tenant_id, profile in self.tenant_profiles.items()}
+            # Замена одной ссылкой атомарна: рабочие потоки видят либо старый, либо новый индекс
+            self.keyword_index = index
+            self.tenant_overlays = overlays
+            self.keywords_file = keywords_file
+        
+        logger.info(f"Ключевые слова перезагружены из {keywords_file}: переиспользовано "
+                    f"{index.reused_subcategories} из {len(index.subcategories)} подкатегорий")
+        return True
+    
+    def watch_keywords(self, keywords_file: Optional[str] = None, debounce: float = 0.5) -> None:
+        # Автоматическая перезагрузка при изменении файла ключевых слов
+        keywords_file = keywords_file or self.keywords_file
+        if not keywords_file:
+            raise ValueError("Не задан файл ключевых слов")
         
-        return patterns
+        self.stop_watching()
+        self.keywords_file = keywords_file
+        self._watcher = KeywordFileWatcher(keywords_file, self.reload_keywords, debounce=debounce)
+        self._watcher.start()
+    
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def set_tenant_profile(self, tenant_id: str, add: Optional[Dict] = None, remove: Optional[Dict] = None) -> None:
+        # add / remove - ключевые слова в формате KEYWORDS, добавляемые к общим и исключаемые из них
+        with self._reload_lock:
+            profile = {'add': add or {}, 'remove': remove or {}}
+            overlay = get_keyword_overlay(self.keyword_index, profile['add'], profile['remove'])
+            self.tenant_profiles = {**self.tenant_profiles, tenant_id: profile}
+            self.tenant_overlays = {**self.tenant_overlays, tenant_id: overlay}
+    
+    def remove_tenant_profile(self, tenant_id: str) -> None:
+        with self._reload_lock:
+            self.tenant_profiles = {key: value for key, value in self.tenant_profiles.items() if key != tenant_id}
+            self.tenant_overlays = {key: value for key, value in self.tenant_overlays.items() if key != tenant_id}
+    
+    def _keyword_matcher(self, tenant_id: Optional[str] = None):
+        # Индекс профиля подразделения; без профиля - общий индекс
+        if tenant_id is not None:
+            overlay = self.tenant_overlays.get(tenant_id)
+            if overlay is not None:
+                return overlay
+            logger.debug(f"Профиль ключевых слов {tenant_id} не задан, используется общий")
+        return self.keyword_index
     
     def _normalize_text(self, text: str) -> str:
+        return self._normalize_chunk(text).strip()
+    
+    def _normalize_chunk(self, text: str) -> str:
         # Приводим к нижнему регистру
         text = text.lower()
         
@@ -114,26 +296,23 @@ class ActivityClassifier:
         # Удаляем специальные символы, но сохраняем буквы и цифры
         text = re.sub(r'[^\w\s.,!?;:]', ' ', text)
         
-        return text.strip()
+        return text
+    
+    def _iter_chunks(self, text: str):
+        # Части текста, заканчивающиеся на конце серии пробельных символов
+        chunk_size = self.thresholds['stream_chunk_size']
+        position = 0
+        while position < len(text):
+            end = position + chunk_size
+            if end < len(text):
+                whitespace = _WHITESPACE.search(text, end)
+                end = whitespace.end() if whitespace else len(text)
+            yield text[position:end]
+            position = end
     
-    def _find_matches(self, text: str) -> Dict[str, Dict[str, List[str]]]:
+    def _find_matches(self, text: str, tenant_id: Optional[str] = None) -> Dict[str, Dict[str, List[str]]]:
         normalized_text = self._normalize_text(text)
-        matches = {}
-        
-        for category, subcategories in self.compiled_patterns.items():
-            category_matches = {}
-            for subcategory, pattern in subcategories.items():
-                # Ищем все совпадения
-                found = pattern.findall(normalized_text)
-                if found:
-                    # Убираем дубликаты
-                    unique_matches = list(set([m.lower() for m in found]))
-                    category_matches[subcategory] = unique_matches
-            
-            if category_matches:
-                matches[category] = category_matches
-        
-        return matches
+        return self._keyword_matcher(tenant_id).find_matches(normalized_text)
     
     def _calculate_confidence(self, matches: Dict[str, Dict[str, List[str]]], 
                             text_length: int) -> Dict[ActivityCategory, float]:
@@ -179,6 +358,101 @@ class ActivityClassifier:
         
         return confidences
     
+    def _calculate_confidence_batch(self, category_counts: np.ndarray, total_matches: np.ndarray,
+                                    text_lengths: np.ndarray, ocr_confidences: np.ndarray) -> np.ndarray:
+        # То же, что _calculate_confidence с поправкой на OCR, для матрицы
+        # совпадений (текст x категория) в порядке ActivityCategory без UNKNOWN
+        total_matches = total_matches[:, None]
+        base_confidence = np.divide(category_counts, total_matches,
+                                    out=np.zeros(category_counts.shape), where=total_matches > 0)
+        
+        length_factor = np.minimum(1.0, text_lengths * self.thresholds['text_length_factor'])[:, None]
+        weights = np.array([self.category_weights.get(category, 1.0)
+                            for category in ActivityCategory if category != ActivityCategory.UNKNOWN])
+        
+        confidences = np.minimum(1.0, base_confidence * weights * length_factor)
+        return confidences * ocr_confidences[:, None]
+    
+    def classify_batch(self, texts: List[str], ocr_confidences: Optional[List[float]] = None,
+                       return_matches: bool = False, tenant_id: Optional[str] = None) -> BatchClassificationResult:
+        # Классификация пакета текстов с результатом по столбцам: совпадения ищутся
+        # для каждого текста, подсчет уверенности и выбор категорий - векторно.
+        # Результаты совпадают с classify (без stream_long_texts)
+        n = len(texts)
+        ocr_confidences = np.ones(n) if ocr_confidences is None else np.asarray(ocr_confidences, dtype=float)
+        
+        keyword_index = self._keyword_matcher(tenant_id)
+        categories = [category for category in ActivityCategory if category != ActivityCategory.UNKNOWN]
+        category_columns = {self._category_to_str(category): column for column, category in enumerate(categories)}
+        subcategory_ids = {owner: i for i, owner in enumerate(keyword_index.subcategories)}
+        
+        # Матрица (текст x подкатегория) с числом найденных ключевых слов
+        subcategory_counts = np.zeros((n, len(keyword_index.subcategories)), dtype=np.int32)
+        text_lengths = np.zeros(n)
+        sufficient_text = np.zeros(n, dtype=bool)
+        all_matches = [None] * n if return_matches else None
+        
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 10:
+                continue
+            
+            sufficient_text[i] = True
+            text_lengths[i] = len(text)
+            matches = keyword_index.find_matches(self._normalize_text(text))
+            for category, subcategories in matches.items():
+                for subcategory, matches_list in subcategories.items():
+                    subcategory_counts[i, subcategory_ids[(category, subcategory)]] = len(matches_list)
+            if return_matches:
+                all_matches[i] = matches
+        
+        # Подкатегория -> столбец категории (-1 для категорий вне ActivityCategory)
+        subcategory_columns = np.array([category_columns.get(category, -1)
+                                        for category, _ in keyword_index.subcategories], dtype=np.int64)
+        membership = (subcategory_columns[:, None] == np.arange(len(categories))[None, :]).astype(np.int32)
+        category_counts = subcategory_counts @ membership
+        # В общее число входят и совпадения категорий вне ActivityCategory, как в _calculate_confidence
+        total_matches = subcategory_counts.sum(axis=1)
+        
+        confidences = self._calculate_confidence_batch(category_counts, total_matches,
+                                                       text_lengths, ocr_confidences)
+        
+        # argmax выбирает первую из равных категорий, как max() по словарю в classify
+        best_columns = confidences.argmax(axis=1)
+        best_confidences = confidences[np.arange(n), best_columns]
+        recognized = sufficient_text & (best_confidences >= self.thresholds['min_confidence'])
+        
+        category_ids = np.where(recognized, best_columns, list(ActivityCategory).index(ActivityCategory.UNKNOWN))
+        best_confidences = np.where(recognized, best_confidences, 0.0)
+        
+        # Подкатегория с наибольшим числом совпадений внутри выбранной категории
+        in_best_category = subcategory_columns[None, :] == best_columns[:, None]
+        masked_counts = np.where(in_best_category, subcategory_counts, -1)
+        best_subcategories = masked_counts.argmax(axis=1)
+        has_subcategory = recognized & (masked_counts[np.arange(n), best_subcategories] > 0)
+        
+        matched_keywords = None
+        if return_matches:
+            matched_keywords = []
+            for i in range(n):
+                keywords = []
+                if recognized[i]:
+                    category_str = self._category_to_str(categories[best_columns[i]])
+                    for matches_list in all_matches[i].get(category_str, {}).values():
+                        keywords.extend(matches_list)
+                matched_keywords.append(keywords[:10])
+        
+        return BatchClassificationResult(
+            categories=categories,
+            subcategories=list(keyword_index.subcategories),
+            confidences=confidences,
+            category_ids=category_ids,
+            best_confidences=best_confidences,
+            subcategory_ids=np.where(has_subcategory, best_subcategories, -1),
+            sufficient_text=sufficient_text,
+            timestamp=datetime.now(),
+            matched_keywords=matched_keywords
+        )
+    
     def _category_to_str(self, category: ActivityCategory) -> str:
         mapping = {
             ActivityCategory.WORK: 'work',
@@ -203,7 +477,7 @@ class ActivityClassifier:
     def get_subcategory_name(self, subcategory: str) -> str:
         return SUBCATEGORY_MAPPING.get(subcategory, subcategory)
     
-    def classify(self, text: str, ocr_confidence: float = 1.0) -> ClassificationResult:
+    def classify(self, text: str, ocr_confidence: float = 1.0, tenant_id: Optional[str] = None) -> ClassificationResult:
         # Если текст пустой или слишком короткий
         if not text or len(text.strip()) < 10:
             return ClassificationResult(
@@ -216,9 +490,80 @@ class ActivityClassifier:
                 timestamp=datetime.now()
             )
         
-        # Поиск совпадений
-        matches = self._find_matches(text)
+        if self.stream_long_texts and len(text) >= self.thresholds['stream_min_length']:
+            return self.classify_stream(text, ocr_confidence, tenant_id)
+        
+        normalized_text = self._normalize_text(text)
+        keyword_matcher = self._keyword_matcher(tenant_id)
+        
+        # Поиск совпадений. В кэше хранятся только совпадения: они зависят от нормализованного
+        # текста и ключевых слов, а уверенность OCR (своя у каждого кадра), поправка на длину,
+        # пороги и веса применяются после поиска. Хеш ключевых слов вычисляется один раз
+        # при построении индекса или профиля, после перезагрузки прежние записи не находятся
+        memo_key = None
+        matches = None
+        if self.memo_cache is not None:
+            memo_key = text_key(keyword_matcher.content_hash, normalized_text)
+            matches = self.memo_cache.get(memo_key)
+        
+        if matches is None:
+            matches = keyword_matcher.find_matches(normalized_text)
+            if memo_key is not None:
+                self.memo_cache.put(memo_key, matches)
+        
+        return self._build_result(text, matches, ocr_confidence)
+    
+    def classify_stream(self, text: str, ocr_confidence: float = 1.0,
+                        tenant_id: Optional[str] = None) -> ClassificationResult:
+        # Нормализация и поиск по частям с подсчетом совпадений по категориям.
+        # Если лидерство одной категории решающее, остаток текста не просматривается;
+        # иначе результат тот же, что у полного просмотра
+        if not text or len(text.strip()) < 10:
+            return self.classify(text, ocr_confidence, tenant_id)
+        
+        stream = KeywordStream(self._keyword_matcher(tenant_id))
+        chunks = self._iter_chunks(text)
+        for chunk in chunks:
+            stream.feed(self._normalize_chunk(chunk))
+            if self._is_decisive(stream.counts(), len(text), ocr_confidence):
+                stream.stop()
+                logger.debug(f"Потоковая классификация остановлена досрочно: "
+                             f"просмотрено {stream.position} символов из {len(text)}")
+                break
+        else:
+            stream.finish()
         
+        return self._build_result(text, stream.matches(), ocr_confidence)
+    
+    def _is_decisive(self, counts: Dict[Tuple[str, str], int], text_length: int, ocr_confidence: float) -> bool:
+        total_matches = sum(counts.values())
+        if total_matches < self.thresholds['stream_min_matches']:
+            return False
+        
+        category_counts = {}
+        for (category, _), count in counts.items():
+            category_counts[category] = category_counts.get(category, 0) + count
+        
+        scores = sorted(
+            (count * self.category_weights.get(self._str_to_category(category), 1.0), count)
+            for category, count in category_counts.items()
+            if self._str_to_category(category) != ActivityCategory.UNKNOWN
+        )
+        if not scores:
+            return False
+        
+        leader_score, leader_count = scores[-1]
+        runner_up_score = scores[-2][0] if len(scores) > 1 else 0.0
+        if leader_score < self.thresholds['stream_lead_ratio'] * runner_up_score:
+            return False
+        
+        # Лидер должен проходить порог уверенности уже по найденным совпадениям
+        length_factor = min(1.0, text_length * self.thresholds['text_length_factor'])
+        confidence = min(1.0, leader_score / total_matches * length_factor) * ocr_confidence
+        return confidence >= self.thresholds['min_confidence']
+    
+    def _build_result(self, text: str, matches: Dict[str, Dict[str, List[str]]],
+                      ocr_confidence: float) -> ClassificationResult:
         # Расчет уверенности
         confidences = self._calculate_confidence(matches, len(text))
         
@@ -264,21 +609,18 @@ class ActivityClassifier:
         # Получаем русские названия
         subcategory_name = self.get_subcategory_name(subcategory)
         
-        # Создаем краткое содержание текста
-        text_summary = text[:500] + ('...' if len(text) > 500 else '')
-        
         return ClassificationResult(
             category=best_category_enum,
             subcategory=subcategory_name,
             confidence=best_confidence,
             matched_keywords=matched_keywords[:10],
             detected_apps=detected_apps[:5],
-            text_summary=text_summary,
-            timestamp=datetime.now()
+            # Краткое содержание строится из текста при первом обращении
+            text=text
         )
     
     def classify_image(self, image_path: str, 
-                      ocr_processor: 'OCRProcessor') -> ClassificationResult:
+                      ocr_processor: 'OCRProcessor', tenant_id: Optional[str] = None) -> ClassificationResult:
         try:
             # Извлекаем текст
             ocr_result = ocr_processor.extract_text(image_path)
@@ -296,7 +638,7 @@ class ActivityClassifier:
             
             # Классифицируем текст
             confidence = ocr_result['confidence'] / 100.0  # Нормализуем 0-100 в 0-1
-            return self.classify(ocr_result['text'], confidence)
+            return self.classify(ocr_result['text'], confidence, tenant_id)
             
         except Exception as e:
             logger.error(f"Ошибка при классификации изображения: {e}")
@@ -313,10 +655,14 @@ class ActivityClassifier:
     def export_keywords(self, filepath: str) -> None:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(self.keywords, f, ensure_ascii=False, indent=2)
+        
+        # Экспортированный файл становится источником для reload_keywords
+        if self.keywords_file is None:
+            self.keywords_file = filepath
     
     @classmethod
     def from_json(cls, keywords_file: str) -> 'ActivityClassifier':
         with open(keywords_file, 'r', encoding='utf-8') as f:
             keywords = json.load(f)
         
-        return cls(keywords)
+        return cls(keywords, keywords_file=keywords_file)
@@ -0,0 +1,529 @@
+import json
+import time
+import difflib
+import statistics
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from ocr_processor import OCRProcessor
+from resource_manager import ResourceManager
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+
+def collect_images(paths: List[str]) -> List[Path]:
+    images = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            images.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS))
+        elif path.exists():
+            images.append(path)
+        else:
+            print(f"✗ Файл не найден: {path}")
+    return images
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    # Медиана времени выполнения в секундах
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def benchmark_text_regions(ocr: OCRProcessor, images: List[Path], repeat: int) -> None:
+    print("\nРаспознавание всего кадра и только областей с текстом")
+    print(f"{'Изображение':<40} {'Пикселей (кадр)':>16} {'Пикселей (обл.)':>16} {'Кадр, мс':>10} {'Обл., мс':>10}")
+
+    enabled = ocr.text_region_config['enabled']
+    totals = {'full_pixels': 0, 'region_pixels': 0, 'full_time': 0.0, 'region_time': 0.0}
+
+    try:
+        for image_path in images:
+            processed, _ = ocr._preprocess_image(ocr._load_image(str(image_path)))
+            mosaic, placements = ocr._crop_to_text_regions(processed)
+            full_pixels = processed.size
+            region_pixels = mosaic.size if placements else full_pixels
+
+            ocr.text_region_config['enabled'] = False
+            full_time = measure(lambda: ocr.extract_text(str(image_path)), repeat)
+            ocr.text_region_config['enabled'] = True
+            region_time = measure(lambda: ocr.extract_text(str(image_path)), repeat)
+
+            totals['full_pixels'] += full_pixels
+            totals['region_pixels'] += region_pixels
+            totals['full_time'] += full_time
+            totals['region_time'] += region_time
+
+            print(f"{image_path.name[:40]:<40} {full_pixels:>16} {region_pixels:>16} "
+                  f"{full_time * 1000:>10.1f} {region_time * 1000:>10.1f}")
+    finally:
+        ocr.text_region_config['enabled'] = enabled
+
+    if images and totals['full_time'] > 0:
+        print(f"\nПикселей обработано: {totals['region_pixels'] / totals['full_pixels']:.1%} от полного кадра")
+        print(f"Время: {totals['region_time'] / totals['full_time']:.1%} от полного кадра")
+
+def benchmark_preprocessing(ocr: OCRProcessor, images: List[Path], repeat: int) -> None:
+    config = ocr.preprocessing_config
+    print(f"\nПредобработка: масштаб {config['resize_factor']}, шумоподавление {config['denoise_method']}, "
+          f"бинаризация {config['binarization']}")
+    print(f"{'Изображение':<40} {'Мпикс':>8} {'Декод., мс':>11} {'Предобр., мс':>13} {'мс/Мпикс':>10}")
+
+    total_megapixels = 0.0
+    total_time = 0.0
+
+    for image_path in images:
+        data = image_path.read_bytes()
+        image = ocr._load_image(data)
+        megapixels = image.shape[0] * image.shape[1] / 1_000_000
+
+        decode_time = measure(lambda: ocr._load_image(data), repeat)
+        preprocess_time = measure(lambda: ocr._preprocess_image(image), repeat)
+
+        total_megapixels += megapixels
+        total_time += preprocess_time
+
+        print(f"{image_path.name[:40]:<40} {megapixels:>8.2f} {decode_time * 1000:>11.1f} "
+              f"{preprocess_time * 1000:>13.1f} {preprocess_time * 1000 / megapixels:>10.2f}")
+
+    if total_megapixels > 0:
+        print(f"\nСреднее время предобработки: {total_time * 1000 / total_megapixels:.2f} мс/Мпикс")
+
+def word_agreement(text: str, reference: str) -> float:
+    # Доля совпадающих слов (по diff последовательностей слов)
+    words = text.split()
+    reference_words = reference.split()
+    if not words and not reference_words:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference_words, words, autojunk=False).ratio()
+
+def calibrate_recognition_modes(ocr: OCRProcessor, images: List[Path], repeat: int,
+                                modes: List[Tuple[int, int]], dictionaries: List[bool],
+                                lang: str, tolerance: float) -> Dict[str, Any]:
+    # Эталон: файл <имя>.txt рядом со скриншотом, иначе результат PSM 3 со словарями
+    disable_dictionaries = ocr.recognition_config['disable_dictionaries']
+    report_images = []
+
+    try:
+        for image_path in images:
+            processed, _ = ocr._preprocess_image(ocr._load_image(str(image_path)))
+            layout = ocr._analyze_layout(processed)
+            route = ocr._route_language(processed, lang)
+            auto_mode = tuple(ocr.layout_config['modes'][layout])
+
+            ground_truth = image_path.with_suffix('.txt')
+            if ground_truth.exists():
+                reference = ground_truth.read_text(encoding='utf-8')
+                reference_source = 'ground_truth'
+            else:
+                ocr.recognition_config['disable_dictionaries'] = False
+                reference = ocr._run_tesseract(processed, route, (3, 3)).get('raw_text', '')
+                reference_source = 'psm3'
+
+            runs = []
+            for disabled in dictionaries:
+                ocr.recognition_config['disable_dictionaries'] = disabled
+                for psm, oem in modes:
+                    outputs = []
+                    latency = measure(lambda: outputs.append(ocr._run_tesseract(processed, route, (psm, oem))), repeat)
+                    result = outputs[-1]
+                    runs.append({
+                        'psm': psm,
+                        'oem': oem,
+                        'dictionaries': not disabled,
+                        'auto': (psm, oem) == auto_mode and not disabled,
+                        'latency_ms': round(latency * 1000, 2),
+                        'accuracy': round(word_agreement(result.get('raw_text', ''), reference), 4),
+                        'success': bool(result.get('success')),
+                        'error': result.get('error')
+                    })
+
+            report_images.append({
+                'image': str(image_path),
+                'pixels': int(processed.size),
+                'layout': layout,
+                'language': route,
+                'reference': reference_source,
+                'runs': runs
+            })
+            print(f"✓ {image_path.name}: разметка {layout}, режимов проверено: {len(runs)}")
+    finally:
+        ocr.recognition_config['disable_dictionaries'] = disable_dictionaries
+
+    return {
+        'images': report_images,
+        'summary': summarize_calibration(report_images),
+        'recommended_modes': recommend_modes(report_images, tolerance)
+    }
+
+def _group_runs(report_images: List[Dict[str, Any]], by_layout: bool) -> Dict[Tuple, List[Dict[str, Any]]]:
+    groups = {}
+    for entry in report_images:
+        for run in entry['runs']:
+            key = (run['psm'], run['oem'], run['dictionaries'])
+            if by_layout:
+                key = (entry['layout'],) + key
+            groups.setdefault(key, []).append(run)
+    return groups
+
+def summarize_calibration(report_images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    summary = []
+    for (psm, oem, dictionaries), runs in sorted(_group_runs(report_images, False).items()):
+        summary.append({
+            'psm': psm,
+            'oem': oem,
+            'dictionaries': dictionaries,
+            'latency_ms': round(statistics.mean(run['latency_ms'] for run in runs), 2),
+            'accuracy': round(statistics.mean(run['accuracy'] for run in runs), 4)
+        })
+    return summary
+
+def recommend_modes(report_images: List[Dict[str, Any]], tolerance: float) -> Dict[str, Dict[str, Any]]:
+    # Для каждого типа разметки - самый быстрый режим с точностью не ниже лучшей минус tolerance
+    by_layout = {}
+    for (layout, psm, oem, dictionaries), runs in _group_runs(report_images, True).items():
+        by_layout.setdefault(layout, []).append({
+            'psm': psm,
+            'oem': oem,
+            'dictionaries': dictionaries,
+            'latency_ms': statistics.mean(run['latency_ms'] for run in runs),
+            'accuracy': statistics.mean(run['accuracy'] for run in runs)
+        })
+
+    recommended = {}
+    for layout, candidates in by_layout.items():
+        best_accuracy = max(candidate['accuracy'] for candidate in candidates)
+        acceptable = [c for c in candidates if c['accuracy'] >= best_accuracy - tolerance]
+        choice = min(acceptable, key=lambda c: c['latency_ms'])
+        recommended[layout] = {key: round(value, 4) if isinstance(value, float) else value
+                               for key, value in choice.items()}
+    return recommended
+
+def print_calibration(report: Dict[str, Any]) -> None:
+    print(f"\n{'PSM':>4} {'OEM':>4} {'Словари':>8} {'мс':>10} {'Точность':>9}")
+    for row in report['summary']:
+        print(f"{row['psm']:>4} {row['oem']:>4} {'да' if row['dictionaries'] else 'нет':>8} "
+              f"{row['latency_ms']:>10.1f} {row['accuracy']:>9.1%}")
+
+    print("\nРекомендуемые режимы (layout_config['modes']):")
+    for layout, choice in sorted(report['recommended_modes'].items()):
+        dictionaries = '' if choice['dictionaries'] else ', без словарей'
+        print(f"  {layout:<8} PSM {choice['psm']}, OEM {choice['oem']}{dictionaries}: "
+              f"{choice['latency_ms']:.1f} мс, точность {choice['accuracy']:.1%}")
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_mixed_load(ocr: OCRProcessor, images: List[Path], transformer, texts: List[str],
+                   ocr_workers: int, duration: float) -> Dict[str, Any]:
+    # OCR в ocr_workers потоках и инференс в одном потоке одновременно в течение duration секунд
+    deadline = time.perf_counter() + duration
+    latencies = {'ocr': [], 'inference': []}
+    lock = threading.Lock()
+
+    def loop(kind: str, offset: int) -> None:
+        index = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if kind == 'ocr':
+                ocr.extract_text(str(images[index % len(images)]))
+            else:
+                transformer.classify(texts[index % len(texts)])
+            with lock:
+                latencies[kind].append(time.perf_counter() - started)
+            index += 1
+
+    threads = [threading.Thread(target=loop, args=('ocr', i)) for i in range(ocr_workers)]
+    if transformer is not None:
+        threads.append(threading.Thread(target=loop, args=('inference', 0)))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        kind: {
+            'per_second': len(values) / duration,
+            'p95_ms': percentile(values, 0.95) * 1000
+        }
+        for kind, values in latencies.items()
+    }
+
+def benchmark_cpu_split(ocr: OCRProcessor, images: List[Path], shares: List[float], total_cores: Optional[int],
+                        model_path: Optional[str], duration: float) -> None:
+    transformer = None
+    if model_path:
+        from llm.transformer_classifer import TransformerClassifier
+        transformer = TransformerClassifier(model_path)
+
+    # Тексты для инференса берем из самих скриншотов
+    texts = [ocr.extract_text(str(image_path))['text'] or image_path.stem for image_path in images]
+
+    manager = ResourceManager(total_cores=total_cores)
+    manager.register_ocr(ocr)
+    if transformer is not None:
+        manager.register_transformer(transformer)
+
+    print(f"\nСмешанная нагрузка OCR + инференс, бюджет {manager.allocation.total_cores} ядер, {duration:.0f} с на замер")
+    print(f"{'Доля OCR':>9} {'Потоков OCR':>12} {'OMP':>4} {'Потоков torch':>14} "
+          f"{'OCR/с':>8} {'OCR p95, мс':>12} {'Инф./с':>8} {'Инф. p95, мс':>13}")
+
+    for share in shares:
+        allocation = manager.set_budget(ocr_share=share)
+        stats = run_mixed_load(ocr, images, transformer, texts, allocation.ocr_workers, duration)
+        inference = stats['inference']
+        print(f"{share:>9.2f} {allocation.ocr_workers:>12} {allocation.ocr_threads_per_worker:>4} "
+              f"{allocation.inference_threads:>14} {stats['ocr']['per_second']:>8.2f} {stats['ocr']['p95_ms']:>12.1f} "
+              f"{inference['per_second']:>8.2f} {inference['p95_ms']:>13.1f}")
+
+def load_texts(dataset_path: str) -> List[str]:
+    # Тексты из набора данных в формате llm/dataset: [{'text': ..., 'category': ...}, ...]
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        return [item['text'] for item in json.load(f)]
+
+def benchmark_classify_batch(texts: List[str], repeat: int, batch_size: int) -> None:
+    from activity_classifier import ActivityClassifier
+
+    classifier = ActivityClassifier()
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+    single = measure(lambda: [classifier.classify(text) for text in texts], repeat)
+    batch = measure(lambda: [classifier.classify_batch(chunk) for chunk in batches], repeat)
+
+    print(f"\nКлассификация по ключевым словам: {len(texts)} текстов, пакеты по {batch_size}")
+    print(f"{'Режим':<16} {'Всего, мс':>10} {'Текстов/с':>11}")
+    for name, seconds in (('classify', single), ('classify_batch', batch)):
+        print(f"{name:<16} {seconds * 1000:>10.1f} {len(texts) / seconds:>11.0f}")
+
+def benchmark_transformer_batch(texts: List[str], model_path: Optional[str], batch_sizes: List[int],
+                                repeat: int) -> None:
+    from llm.transformer_classifer import TransformerClassifier
+
+    transformer = TransformerClassifier(model_path)
+    # Прогрев: первые вызовы включают выделение памяти и инициализацию ядер
+    transformer.classify_batch(texts[:8])
+
+    single = measure(lambda: [transformer.classify(text) for text in texts], repeat)
+    reference = [transformer.classify(text) for text in texts]
+
+    print(f"\nТрансформер: {len(texts)} текстов, потоков torch {transformer.num_threads}")
+    print(f"{'Режим':<22} {'Текстов/с':>10} {'Ускорение':>10} {'Расхождение':>12}")
+    print(f"{'classify':<22} {len(texts) / single:>10.1f} {1.0:>10.2f} {'-':>12}")
+
+    for batch_size in batch_sizes:
+        seconds = measure(lambda: transformer.classify_batch(texts, batch_size), repeat)
+        results = transformer.classify_batch(texts, batch_size)
+        # Доля текстов, где пакетный режим выбрал другую категорию, чем поштучный
+        mismatch = sum(a.category_id != b.category_id for a, b in zip(results, reference)) / len(texts)
+        print(f"{f'classify_batch({batch_size})':<22} {len(texts) / seconds:>10.1f} "
+              f"{single / seconds:>10.2f} {mismatch:>12.2%}")
+
+def model_size_bytes(model) -> int:
+    # Размер сериализованного state_dict (для квантованных Linear - упакованные int8):
+    # это размер файла весов на диске, а не память процесса во время работы
+    import io
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+def benchmark_quantization(dataset_path: str, model_path: Optional[str], batch_size: int) -> None:
+    from llm.transformer_classifer import TransformerClassifier
+
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+    texts = [sample['text'] for sample in samples]
+
+    report = {}
+    predictions = {}
+    for mode in (None, 'int8'):
+        started = time.perf_counter()
+        transformer = TransformerClassifier(model_path, quantize=mode)
+        load_seconds = time.perf_counter() - started
+
+        latencies = []
+        for text in texts:
+            started = time.perf_counter()
+            transformer.classify(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        results = transformer.classify_batch(texts, batch_size)
+        batch_seconds = time.perf_counter() - started
+
+        predictions[mode] = [result.category for result in results]
+        report[mode or 'fp32'] = {
+            'load_s': load_seconds,
+            'artifact_mb': model_size_bytes(transformer.model) / 2 ** 20,
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'batch_per_second': len(texts) / batch_seconds,
+            'accuracy': sum(p == s['category'] for p, s in zip(predictions[mode], samples)) / len(samples)
+        }
+        del transformer
+
+    agreement = sum(a == b for a, b in zip(predictions[None], predictions['int8'])) / len(texts)
+
+    print(f"\nКвантование трансформера: {dataset_path}, {len(texts)} текстов")
+    print(f"{'Режим':<6} {'Загрузка, с':>12} {'Файл весов, МБ':>15} {'p50, мс':>8} {'p95, мс':>8} "
+          f"{'Пакет, т/с':>11} {'Точность':>9}")
+    for mode, row in report.items():
+        print(f"{mode:<6} {row['load_s']:>12.2f} {row['artifact_mb']:>15.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['batch_per_second']:>11.1f} {row['accuracy']:>9.2%}")
+
+    fp32, int8 = report['fp32'], report['int8']
+    print(f"\nРазница int8: файл весов {int8['artifact_mb'] / fp32['artifact_mb'] - 1:+.0%}, "
+          f"p50 {int8['p50_ms'] / fp32['p50_ms'] - 1:+.0%}, "
+          f"пакет {int8['batch_per_second'] / fp32['batch_per_second'] - 1:+.0%}, "
+          f"точность {int8['accuracy'] - fp32['accuracy']:+.2%}, совпадение с fp32 {agreement:.2%}")
+
+def benchmark_onnx(texts: List[str], model_path: Optional[str], onnx_paths: List[str], batch_size: int) -> None:
+    from llm.transformer_classifer import TransformerClassifier
+
+    backends = [('torch', TransformerClassifier(model_path))]
+    backends += [(Path(onnx_path).name, TransformerClassifier(model_path, backend='onnx', onnx_path=onnx_path))
+                 for onnx_path in onnx_paths]
+    reference = None
+
+    print(f"\nЗадержка torch против onnxruntime: {len(texts)} текстов, пакет {batch_size}")
+    print(f"{'Backend':<24} {'p50, мс':>8} {'p95, мс':>8} {'Пакет, т/с':>11} {'Макс. разн. логитов':>20}")
+
+    for name, transformer in backends:
+        transformer.classify_batch(texts[:8])
+
+        latencies = []
+        for text in texts:
+            started = time.perf_counter()
+            transformer.classify(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        results = transformer.classify_batch(texts, batch_size)
+        per_second = len(texts) / (time.perf_counter() - started)
+
+        if reference is None:
+            reference = results
+        difference = max(max(abs(a - b) for a, b in zip(result.logits, ref.logits))
+                         for result, ref in zip(results, reference))
+        print(f"{name:<24} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+              f"{per_second:>11.1f} {difference:>20.2e}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Бенчмарки OCR и классификации экранной активности')
+    parser.add_argument('--tesseract', type=str, help='Путь к исполняемому файлу Tesseract')
+    parser.add_argument('--backend', type=str, default='auto', choices=['auto', 'pool', 'subprocess'],
+                        help='Режим запуска Tesseract')
+    parser.add_argument('--repeat', type=int, default=3, help='Число повторов каждого замера')
+    parser.add_argument('--verbose', action='store_true', help='Показывать журнал OCRProcessor')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    regions = subparsers.add_parser('regions', help='Полный кадр против областей с текстом')
+    regions.add_argument('images', nargs='+', help='Скриншоты или каталоги со скриншотами')
+
+    preprocess = subparsers.add_parser('preprocess', help='Время предобработки на мегапиксель')
+    preprocess.add_argument('images', nargs='+', help='Скриншоты или каталоги со скриншотами')
+    preprocess.add_argument('--resize-factor', type=float, help='Коэффициент масштабирования')
+    preprocess.add_argument('--denoise', choices=['none', 'median', 'nlmeans'], help='Метод шумоподавления')
+    preprocess.add_argument('--binarization', choices=['none', 'fixed', 'otsu', 'adaptive'],
+                            help='Метод бинаризации')
+
+    calibrate = subparsers.add_parser('calibrate', help='Задержка и точность режимов PSM/OEM')
+    calibrate.add_argument('images', nargs='+', help='Скриншоты или каталоги (эталон - <имя>.txt рядом)')
+    calibrate.add_argument('--psm', type=int, nargs='+', default=[3, 6, 7, 11], help='Проверяемые PSM')
+    calibrate.add_argument('--oem', type=int, nargs='+', default=[3], help='Проверяемые OEM')
+    calibrate.add_argument('--no-dictionaries', action='store_true',
+                           help='Дополнительно проверить режимы без словарей')
+    calibrate.add_argument('--lang', type=str, default='', help='Язык распознавания (по умолчанию автовыбор)')
+    calibrate.add_argument('--tolerance', type=float, default=0.02,
+                           help='Допустимая потеря точности при выборе самого быстрого режима')
+    calibrate.add_argument('--output', type=str, default='ocr_calibration.json', help='Файл отчета JSON')
+
+    cpu_split = subparsers.add_parser('cpu-split', help='Пропускная способность при разном делении ядер')
+    cpu_split.add_argument('images', nargs='+', help='Скриншоты или каталоги со скриншотами')
+    cpu_split.add_argument('--shares', type=float, nargs='+', default=[0.25, 0.5, 0.75],
+                           help='Доли ядер для OCR')
+    cpu_split.add_argument('--cores', type=int, help='Бюджет ядер (по умолчанию все)')
+    cpu_split.add_argument('--model', type=str, help='Каталог модели трансформера (без нее - только OCR)')
+    cpu_split.add_argument('--duration', type=float, default=10.0, help='Длительность каждого замера, с')
+
+    classify_batch = subparsers.add_parser('classify-batch', help='Пакетная классификация против поштучной')
+    classify_batch.add_argument('dataset', help='JSON со списком {"text": ...}')
+    classify_batch.add_argument('--batch-size', type=int, default=1024, help='Размер пакета')
+    classify_batch.add_argument('--scale', type=int, default=1, help='Во сколько раз размножить тексты')
+
+    transformer_batch = subparsers.add_parser('transformer-batch', help='Пакетный инференс трансформера')
+    transformer_batch.add_argument('dataset', help='JSON со списком {"text": ...}')
+    transformer_batch.add_argument('--model', type=str, help='Каталог модели (по умолчанию llm/trained_model)')
+    transformer_batch.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 16, 32, 64],
+                                   help='Размеры пакетов')
+
+    quantization = subparsers.add_parser('quantize', help='Задержка, размер файла весов и точность fp32 против int8')
+    quantization.add_argument('dataset', nargs='?', default=str(Path(__file__).parent / 'llm' / 'dataset' / 'test.json'),
+                              help='JSON со списком {"text": ..., "category": ...}')
+    quantization.add_argument('--model', type=str, help='Каталог модели (по умолчанию llm/trained_model)')
+    quantization.add_argument('--batch-size', type=int, default=16, help='Размер пакета')
+
+    onnx = subparsers.add_parser('onnx', help='Задержка torch против onnxruntime')
+    onnx.add_argument('onnx_paths', nargs='+', help='Файлы ONNX из llm/export_onnx.py')
+    onnx.add_argument('--dataset', type=str, default=str(Path(__file__).parent / 'llm' / 'dataset' / 'test.json'),
+                      help='JSON со списком {"text": ...}')
+    onnx.add_argument('--model', type=str, help='Каталог модели (по умолчанию llm/trained_model)')
+    onnx.add_argument('--batch-size', type=int, default=16, help='Размер пакета')
+
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    if args.command == 'classify-batch':
+        benchmark_classify_batch(load_texts(args.dataset) * args.scale, args.repeat, args.batch_size)
+        return
+    if args.command == 'onnx':
+        benchmark_onnx(load_texts(args.dataset), args.model, args.onnx_paths, args.batch_size)
+        return
+    if args.command == 'quantize':
+        benchmark_quantization(args.dataset, args.model, args.batch_size)
+        return
+    if args.command == 'transformer-batch':
+        benchmark_transformer_batch(load_texts(args.dataset), args.model, args.batch_sizes, args.repeat)
+        return
+
+    ocr = OCRProcessor(args.tesseract, backend=args.backend)
+
+    try:
+        if args.command == 'regions':
+            benchmark_text_regions(ocr, collect_images(args.images), args.repeat)
+        elif args.command == 'preprocess':
+            if args.resize_factor is not None:
+                ocr.preprocessing_config['resize_factor'] = args.resize_factor
+            if args.denoise:
+                ocr.preprocessing_config['denoise_method'] = args.denoise
+            if args.binarization:
+                ocr.preprocessing_config['binarization'] = args.binarization
+            benchmark_preprocessing(ocr, collect_images(args.images), args.repeat)
+        elif args.command == 'calibrate':
+            modes = [(psm, oem) for psm in args.psm for oem in args.oem]
+            dictionaries = [False, True] if args.no_dictionaries else [False]
+            report = calibrate_recognition_modes(ocr, collect_images(args.images), args.repeat,
+                                                 modes, dictionaries, args.lang, args.tolerance)
+            Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+            print_calibration(report)
+            print(f"\nОтчет сохранен: {args.output}")
+        elif args.command == 'cpu-split':
+            benchmark_cpu_split(ocr, collect_images(args.images), args.shares, args.cores,
+                                args.model, args.duration)
+    finally:
+        ocr.close()
+
+if __name__ == "__main__":
+    main()
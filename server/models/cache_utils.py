@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import tempfile
+import logging
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+def get_cache_dir() -> Path:
+    # Каталог кэша можно переопределить переменной окружения SCREEN_ACTIVITY_CACHE_DIR
+    custom_dir = os.environ.get('SCREEN_ACTIVITY_CACHE_DIR')
+    if custom_dir:
+        return Path(custom_dir)
+
+    if sys.platform == 'win32':
+        base_dir = Path(os.environ.get('LOCALAPPDATA', Path.home() / 'AppData' / 'Local'))
+    else:
+        base_dir = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+
+    return base_dir / 'screen_activity'
+
+def write_bytes_atomic(path: Union[str, Path], data: bytes) -> bool:
+    # Запись через временный файл и os.replace: читатели не увидят частично записанный файл
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix='.tmp', delete=False) as temp_file:
+            temp_file.write(data)
+            temp_path = temp_file.name
+        os.replace(temp_path, path)
+        return True
+    except OSError as e:
+        logger.warning(f"Не удалось записать файл кэша {path}: {e}")
+        return False
+
+def read_json(path: Union[str, Path]) -> Optional[Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать файл кэша {path}: {e}")
+        return None
+
+def write_json_atomic(path: Union[str, Path], data: Any) -> bool:
+    return write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
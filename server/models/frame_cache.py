@@ -0,0 +1,111 @@
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Hashable, Tuple, Union
+
+import cv2
+import numpy as np
+
+from activity_classifier import ClassificationResult
+
+logger = logging.getLogger(__name__)
+
+class FrameCache:
+
+    def __init__(self, max_distance: int = 6, max_entries: int = 32,
+                 ttl_seconds: float = 60.0, hash_size: int = 16, max_sessions: int = 1024):
+        # max_distance - допустимое расстояние Хэмминга между хешами (из hash_size**2 бит)
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hash_size = hash_size
+        self.max_sessions = max_sessions
+
+        # Сессия -> (хеш кадра -> (результат, время сохранения)), от старых к новым
+        self._sessions: 'OrderedDict[Hashable, OrderedDict[int, Tuple[ClassificationResult, float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def compute_hash(self, image: Union[str, bytes, np.ndarray]) -> int:
+        # dHash: знак разности соседних пикселей уменьшенного изображения в оттенках серого.
+        # Путь читается через numpy, т.к. cv2.imread не поддерживает не-ASCII пути в Windows
+        if isinstance(image, str):
+            gray = cv2.imdecode(np.fromfile(image, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        else:
+            gray = image if image.ndim == 2 else cv2.cvtColor(image[..., :3], cv2.COLOR_RGB2GRAY)
+
+        if gray is None:
+            raise ValueError("Не удалось прочитать изображение для вычисления хеша")
+
+        small = cv2.resize(gray, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+    def lookup(self, session_id: Hashable, frame_hash: int) -> Optional[ClassificationResult]:
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is not None:
+                self._evict_expired(entries, now)
+
+                # Проверяем сначала самые свежие кадры
+                for cached_hash in reversed(entries):
+                    if bin(cached_hash ^ frame_hash).count('1') <= self.max_distance:
+                        result, _ = entries[cached_hash]
+                        entries.move_to_end(cached_hash)
+                        self._sessions.move_to_end(session_id)
+                        self.hits += 1
+                        return result.copy(timestamp=time.time())
+
+            self.misses += 1
+            return None
+
+    def store(self, session_id: Hashable, frame_hash: int, result: ClassificationResult) -> None:
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is None:
+                entries = OrderedDict()
+                self._sessions[session_id] = entries
+                if len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self.evictions += len(evicted)
+
+            entries[frame_hash] = (result, time.monotonic())
+            entries.move_to_end(frame_hash)
+            self._sessions.move_to_end(session_id)
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def _evict_expired(self, entries: 'OrderedDict[int, Tuple[ClassificationResult, float]]', now: float) -> None:
+        expired = [h for h, (_, stored_at) in entries.items() if now - stored_at > self.ttl_seconds]
+        for frame_hash in expired:
+            del entries[frame_hash]
+        self.evictions += len(expired)
+
+    def clear(self, session_id: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'sessions': len(self._sessions),
+                'entries': sum(len(entries) for entries in self._sessions.values())
+            }
@@ -1,4 +1,6 @@
 import sys
+import time
+import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
@@ -9,15 +11,20 @@ sys.path.insert(0, str(Path(__file__).parent / 'llm'))
 
 from activity_classifier import ActivityClassifier, ActivityCategory, ClassificationResult
 from llm.transformer_classifer import TransformerClassifier, TransformerClassificationResult
+from frame_cache import FrameCache
 
 logger = logging.getLogger(__name__)
 
 class HybridActivityClassifier:
     
-    def __init__(self, transformer_model_path: Optional[str] = None):
+    def __init__(self, transformer_model_path: Optional[str] = None,
+                 frame_cache: Optional[FrameCache] = None):
         self.keyword_classifier = ActivityClassifier()
         self.transformer_classifier = TransformerClassifier(transformer_model_path)
         
+        # Кэш почти одинаковых кадров одной сессии (None - кэш отключен)
+        self.frame_cache = frame_cache
+        
         self.weights = {
             'keyword': 0.5,
             'transformer': 0.5
@@ -35,12 +42,19 @@ class HybridActivityClassifier:
             'neutral': ActivityCategory.NEUTRAL
         }
         
+        # Ограничение одновременных вызовов модели в асинхронном API
+        self.async_config = {
+            'max_inference_concurrency': 2
+        }
+        self._inference_semaphore: Optional[asyncio.Semaphore] = None
+        self._inference_semaphore_loop = None
+        
         logger.info("HybridActivityClassifier инициализирован")
     
-    def classify(self, text: str, ocr_confidence: float = 1.0) -> ClassificationResult:
+    def classify(self, text: str, ocr_confidence: float = 1.0, tenant_id: Optional[str] = None) -> ClassificationResult:
         
-        # 1. Классификация по ключевым словам
-        keyword_result = self.keyword_classifier.classify(text, ocr_confidence)
+        # 1. Классификация по ключевым словам (tenant_id - профиль ключевых слов подразделения)
+        keyword_result = self.keyword_classifier.classify(text, ocr_confidence, tenant_id)
         
         # 2. Классификация через трансформер
         transformer_result = None
@@ -75,14 +89,9 @@ class HybridActivityClassifier:
                 transformer_result.confidence * self.weights['transformer']
             )
             
-            result = ClassificationResult(
-                category=keyword_result.category,
-                subcategory=keyword_result.subcategory,
+            result = keyword_result.copy(
                 confidence=combined_confidence,
-                matched_keywords=keyword_result.matched_keywords,
-                detected_apps=keyword_result.detected_apps,
-                text_summary=keyword_result.text_summary,
-                timestamp=datetime.now(),
+                timestamp=time.time(),
                 classifier_type="hybrid_agreement",
                 transformer_confidence=transformer_result.confidence,
                 keyword_confidence=keyword_result.confidence
@@ -103,14 +112,13 @@ class HybridActivityClassifier:
                 selected_confidence = transformer_result.confidence
                 classifier_type = "transformer_selected"
             
-            result = ClassificationResult(
+            result = keyword_result.copy(
                 category=selected_category,
                 subcategory=selected_subcategory,
                 confidence=selected_confidence,
                 matched_keywords=keyword_result.matched_keywords if classifier_type == "keyword_selected" else [],
                 detected_apps=keyword_result.detected_apps if classifier_type == "keyword_selected" else [],
-                text_summary=keyword_result.text_summary,
-                timestamp=datetime.now(),
+                timestamp=time.time(),
                 classifier_type=classifier_type,
                 transformer_confidence=transformer_result.confidence,
                 keyword_confidence=keyword_result.confidence
@@ -128,23 +136,91 @@ class HybridActivityClassifier:
         else:
             return 'LLM: Нейтральная активность'
     
-    def classify_image(self, image_path: str, ocr_processor) -> ClassificationResult:
+    def classify_image(self, image_path: str, ocr_processor,
+                       session_id: Optional[str] = None, tenant_id: Optional[str] = None) -> ClassificationResult:
+        cache_key = self._frame_cache_key(session_id, tenant_id)
+        frame_hash = self._frame_hash(image_path, session_id)
+        if frame_hash is not None:
+            cached = self.frame_cache.lookup(cache_key, frame_hash)
+            if cached is not None:
+                return cached
+        
         ocr_result = ocr_processor.extract_text(image_path)
         
         if not ocr_result['success']:
-            return ClassificationResult(
-                category=ActivityCategory.UNKNOWN,
-                subcategory='Ошибка OCR',
-                confidence=0.0,
-                matched_keywords=[],
-                detected_apps=[],
-                text_summary='',
-                timestamp=datetime.now(),
-                classifier_type="error"
-            )
+            return self._ocr_error_result()
         
         confidence = ocr_result['confidence'] / 100.0
-        return self.classify(ocr_result['text'], confidence)
+        result = self.classify(ocr_result['text'], confidence, tenant_id)
+        
+        if frame_hash is not None:
+            self.frame_cache.store(cache_key, frame_hash, result)
+        
+        return result
+    
+    async def classify_image_async(self, image, ocr_processor, session_id: Optional[str] = None,
+                                   tenant_id: Optional[str] = None) -> ClassificationResult:
+        loop = asyncio.get_running_loop()
+        
+        cache_key = self._frame_cache_key(session_id, tenant_id)
+        frame_hash = None
+        if self.frame_cache is not None and session_id is not None:
+            frame_hash = await loop.run_in_executor(None, self._frame_hash, image, session_id)
+            if frame_hash is not None:
+                cached = self.frame_cache.lookup(cache_key, frame_hash)
+                if cached is not None:
+                    return cached
+        
+        ocr_result = await ocr_processor.extract_text_async(image)
+        
+        if not ocr_result['success']:
+            return self._ocr_error_result()
+        
+        confidence = ocr_result['confidence'] / 100.0
+        
+        # Инференс выполняется в пуле потоков, чтобы не блокировать цикл событий
+        async with self._get_inference_semaphore():
+            result = await loop.run_in_executor(None, self.classify, ocr_result['text'], confidence, tenant_id)
+        
+        if frame_hash is not None:
+            self.frame_cache.store(cache_key, frame_hash, result)
+        
+        return result
+    
+    @staticmethod
+    def _frame_cache_key(session_id: Optional[str], tenant_id: Optional[str]):
+        # Результат зависит от профиля ключевых слов, поэтому кадры разных профилей не смешиваются
+        return session_id if tenant_id is None else (session_id, tenant_id)
+    
+    def _frame_hash(self, image, session_id: Optional[str]) -> Optional[int]:
+        # Без сессии кадр не кэшируется: иначе похожие экраны разных рабочих мест
+        # получали бы результаты друг друга
+        if self.frame_cache is None or session_id is None:
+            return None
+        try:
+            return self.frame_cache.compute_hash(image)
+        except Exception as e:
+            logger.warning(f"Не удалось вычислить хеш кадра: {e}")
+            return None
+    
+    def _ocr_error_result(self) -> ClassificationResult:
+        return ClassificationResult(
+            category=ActivityCategory.UNKNOWN,
+            subcategory='Ошибка OCR',
+            confidence=0.0,
+            matched_keywords=[],
+            detected_apps=[],
+            text_summary='',
+            timestamp=datetime.now(),
+            classifier_type="error"
+        )
+    
+    def _get_inference_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._inference_semaphore is None or self._inference_semaphore_loop is not loop:
+            self._inference_semaphore = asyncio.Semaphore(self.async_config['max_inference_concurrency'])
+            self._inference_semaphore_loop = loop
+        return self._inference_semaphore
 
 if __name__ == "__main__":
     from ocr_processor import OCRProcessor
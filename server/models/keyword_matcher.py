@@ -0,0 +1,459 @@
+import re
+import json
+import hashlib
+import logging
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterator, Optional, Union, Any
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from cache_utils import get_cache_dir, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Версия формата сохраненных терминов индекса: меняется при изменении keyword_terms
+INDEX_FORMAT_VERSION = 2
+# Сколько последних индексов хранится на диске (каждая перезагрузка с новыми словами добавляет файл)
+INDEX_CACHE_ENTRIES = 8
+
+# Позиции границ слов (\b) ищем встроенным движком регулярных выражений
+_WORD_BOUNDARY = re.compile(r'\b')
+_WORD_TAIL = re.compile(r'\w*')
+
+def _is_word(char: str) -> bool:
+    # То же, что \w в регулярных выражениях Python: буквы, цифры и подчеркивание
+    return char.isalnum() or char == '_'
+
+def keyword_terms(keyword: str) -> List[str]:
+    # Термины поиска для одного ключевого слова (в нижнем регистре):
+    # - 'слово.' - префикс, совпадает с продолжением слова (\bслово\.\w*);
+    # - фраза - целиком и по последнему слову, если оно длиннее трех символов
+    #   (re.escape экранировал пробелы, поэтому из слов фразы совпадать могло только последнее);
+    # - остальные - целым словом (\bслово\b)
+    term = keyword.lower()
+    if term.endswith('.'):
+        return [term]
+
+    terms = [term]
+    if ' ' in term:
+        last_word = term.split()[-1]
+        if len(re.escape(last_word)) > 3:
+            terms.append(last_word)
+    return terms
+
+def is_prefix_term(term: str) -> bool:
+    return term.endswith('.')
+
+def content_hash(data: Any) -> str:
+    # Хеш содержимого списков ключевых слов, не зависящий от порядка ключей словаря
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+class KeywordIndex:
+
+    def __init__(self, keywords: Dict[str, Dict[str, List[str]]], previous: Optional['KeywordIndex'] = None,
+                 cached_terms: Optional[Dict[Tuple[str, str], Tuple[str, List[str]]]] = None):
+        # previous - прежний индекс, cached_terms - термины из кэша на диске:
+        # термины неизменившихся подкатегорий берутся из них
+        self.keywords = keywords
+        self.content_hash = content_hash(keywords)
+        self.backend = 'ahocorasick' if ahocorasick is not None else 'trie'
+
+        # Подкатегория -> (хеш ее ключевых слов, термины)
+        self.subcategory_terms: Dict[Tuple[str, str], Tuple[str, List[str]]] = {}
+        self.reused_subcategories = 0
+
+        for category, subcategories in keywords.items():
+            for subcategory, subcategory_keywords in subcategories.items():
+                owner = (category, subcategory)
+                keywords_hash = content_hash(subcategory_keywords)
+                cached = previous.subcategory_terms.get(owner) if previous is not None else None
+                if cached is None and cached_terms is not None:
+                    cached = cached_terms.get(owner)
+
+                if cached is not None and cached[0] == keywords_hash:
+                    self.subcategory_terms[owner] = cached
+                    self.reused_subcategories += 1
+                else:
+                    terms = [term for keyword in subcategory_keywords for term in keyword_terms(keyword)]
+                    self.subcategory_terms[owner] = (keywords_hash, list(dict.fromkeys(terms)))
+
+        # Термин -> подкатегории (категория, подкатегория), которым он принадлежит
+        self.subcategories: List[Tuple[str, str]] = list(self.subcategory_terms)
+        self.owners: Dict[str, List[Tuple[str, str]]] = {}
+        for owner, (_, terms) in self.subcategory_terms.items():
+            for term in terms:
+                self.owners.setdefault(term, []).append(owner)
+
+        self._automaton = self._build_automaton()
+        self._trie = self._build_trie() if self._automaton is None else None
+
+        logger.info(f"Индекс ключевых слов: {len(self.owners)} терминов, "
+                    f"{len(self.subcategories)} подкатегорий")
+
+    def _build_automaton(self):
+        # Автомат Ахо-Корасик на C, если установлен pyahocorasick
+        if ahocorasick is None or not self.owners:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for term in self.owners:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        return automaton
+
+    def _build_trie(self) -> Dict:
+        # Без pyahocorasick: префиксное дерево, обход которого начинается только на границах
+        # слов. Любой термин начинается с \b, поэтому переходы по ошибке автомата не нужны
+        trie = {}
+        for term in self.owners:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = term
+        return trie
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str, str]]:
+        # Все вхождения терминов с учетом границ слов, в том числе перекрывающиеся:
+        # (начало, конец, термин, совпавший текст). Текст должен быть нормализован
+        if self._automaton is not None:
+            for last_index, term in self._automaton.iter(text):
+                start = last_index - len(term) + 1
+                if self._is_boundary(text, start):
+                    match = self._complete_match(text, start, last_index + 1, term)
+                    if match is not None:
+                        yield match
+            return
+
+        length = len(text)
+        for boundary in _WORD_BOUNDARY.finditer(text):
+            start = boundary.start()
+            node = self._trie
+            position = start
+            while position < length:
+                node = node.get(text[position])
+                if node is None:
+                    break
+                position += 1
+                term = node.get('')
+                if term is not None:
+                    match = self._complete_match(text, start, position, term)
+                    if match is not None:
+                        yield match
+
+    @staticmethod
+    def _is_boundary(text: str, position: int) -> bool:
+        before = position > 0 and _is_word(text[position - 1])
+        after = position < len(text) and _is_word(text[position])
+        return before != after
+
+    def _complete_match(self, text: str, start: int, end: int, term: str) -> Optional[Tuple[int, int, str, str]]:
+        if is_prefix_term(term):
+            end = _WORD_TAIL.match(text, end).end()
+        elif not self._is_boundary(text, end):
+            return None
+        return start, end, term, text[start:end]
+
+    def iter_owned_matches(self, text: str) -> Iterator[Tuple[int, int, str, List[Tuple[str, str]]]]:
+        # Совпадения с подкатегориями, которым они принадлежат: (начало, конец, совпавший текст, подкатегории)
+        for start, end, term, matched in self.iter_matches(text):
+            yield start, end, matched, self.owners[term]
+
+    def max_term_length(self) -> int:
+        return max((len(term) for term in self.owners), default=0)
+
+    def find_matches(self, text: str) -> Dict[str, Dict[str, List[str]]]:
+        return select_matches(self.iter_owned_matches(text), self.subcategories)
+
+def select_matches(owned_matches: Iterator[Tuple[int, int, str, List[Tuple[str, str]]]],
+                   subcategories: List[Tuple[str, str]]) -> Dict[str, Dict[str, List[str]]]:
+    # Внутри подкатегории совпадения выбираются как re.findall: слева направо,
+    # без перекрытий (из совпадений с одного места - самое длинное), затем убираются повторы
+    spans: Dict[Tuple[str, str], List[Tuple[int, int, str]]] = {}
+    for start, end, matched, owners in owned_matches:
+        for owner in owners:
+            spans.setdefault(owner, []).append((start, end, matched))
+
+    matches = {}
+    for owner in subcategories:
+        owner_spans = spans.get(owner)
+        if not owner_spans:
+            continue
+
+        owner_spans.sort(key=lambda span: (span[0], -span[1]))
+        found = []
+        last_end = 0
+        for start, end, matched in owner_spans:
+            if start >= last_end:
+                found.append(matched)
+                last_end = end
+
+        category, subcategory = owner
+        matches.setdefault(category, {})[subcategory] = list(dict.fromkeys(found))
+
+    return matches
+
+class KeywordOverlay:
+
+    def __init__(self, base: KeywordIndex, add: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 remove: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        # Профиль поверх общего индекса: add - ключевые слова, добавляемые к подкатегориям
+        # (в том числе новым), remove - исключаемые из них. Базовый индекс не копируется,
+        # память профиля растет только с размером add и remove
+        self.base = base
+        self.add = add or {}
+        self.remove = remove or {}
+        self.content_hash = content_hash({'base': base.content_hash, 'add': self.add, 'remove': self.remove})
+        self.add_index = KeywordIndex(self.add) if self.add else None
+
+        # (термин, подкатегория) базового индекса, которые профиль исключает. Термин остается,
+        # если его дает другое ключевое слово той же подкатегории
+        self.removed_terms = set()
+        for category, subcategories in self.remove.items():
+            for subcategory, removed_keywords in subcategories.items():
+                owner = (category, subcategory)
+                base_keywords = base.keywords.get(category, {}).get(subcategory, [])
+                removed = {keyword.lower() for keyword in removed_keywords}
+                kept_terms = {term for keyword in base_keywords if keyword.lower() not in removed
+                              for term in keyword_terms(keyword)}
+                _, base_terms = base.subcategory_terms.get(owner, ('', []))
+                self.removed_terms.update((term, owner) for term in base_terms if term not in kept_terms)
+
+        self.subcategories = list(base.subcategories)
+        if self.add_index is not None:
+            self.subcategories += [owner for owner in self.add_index.subcategories
+                                   if owner not in base.subcategory_terms]
+
+        self._keywords = None
+
+    @property
+    def keywords(self) -> Dict[str, Dict[str, List[str]]]:
+        # Итоговые ключевые слова профиля (собираются при первом обращении, например для экспорта)
+        if self._keywords is None:
+            keywords = {}
+            for category, subcategories in self.base.keywords.items():
+                for subcategory, base_keywords in subcategories.items():
+                    removed = {keyword.lower() for keyword in self.remove.get(category, {}).get(subcategory, [])}
+                    keywords.setdefault(category, {})[subcategory] = [
+                        keyword for keyword in base_keywords if keyword.lower() not in removed
+                    ]
+            for category, subcategories in self.add.items():
+                for subcategory, added_keywords in subcategories.items():
+                    merged = keywords.setdefault(category, {}).setdefault(subcategory, [])
+                    merged.extend(keyword for keyword in added_keywords if keyword not in merged)
+            self._keywords = keywords
+        return self._keywords
+
+    def iter_owned_matches(self, text: str) -> Iterator[Tuple[int, int, str, List[Tuple[str, str]]]]:
+        for start, end, term, matched in self.base.iter_matches(text):
+            owners = self.base.owners[term]
+            if self.removed_terms:
+                owners = [owner for owner in owners if (term, owner) not in self.removed_terms]
+            if owners:
+                yield start, end, matched, owners
+
+        if self.add_index is not None:
+            yield from self.add_index.iter_owned_matches(text)
+
+    def max_term_length(self) -> int:
+        add_length = self.add_index.max_term_length() if self.add_index is not None else 0
+        return max(self.base.max_term_length(), add_length)
+
+    def find_matches(self, text: str) -> Dict[str, Dict[str, List[str]]]:
+        return select_matches(self.iter_owned_matches(text), self.subcategories)
+
+# Индексы, уже загруженные в процессе, по хешу содержимого: классификаторы
+# с одинаковыми ключевыми словами используют один экземпляр
+_index_registry = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+
+def get_keyword_overlay(base: KeywordIndex, add: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                        remove: Optional[Dict[str, Dict[str, List[str]]]] = None) -> KeywordOverlay:
+    overlay_hash = content_hash({'base': base.content_hash, 'add': add or {}, 'remove': remove or {}})
+    with _registry_lock:
+        overlay = _index_registry.get(overlay_hash)
+        if overlay is None:
+            overlay = KeywordOverlay(base, add, remove)
+            _index_registry[overlay_hash] = overlay
+    return overlay
+
+def _index_cache_dir() -> Path:
+    return get_cache_dir() / 'keyword_index'
+
+def _index_cache_path(keywords_hash: str) -> Path:
+    return _index_cache_dir() / f"v{INDEX_FORMAT_VERSION}-{keywords_hash[:32]}.json"
+
+def load_keyword_index(keywords: Dict[str, Dict[str, List[str]]],
+                       previous: Optional[KeywordIndex] = None) -> KeywordIndex:
+    # Индекс с тем же хешом содержимого берется из уже загруженных в процессе,
+    # иначе строится с терминами из кэша на диске или неизменившихся подкатегорий previous
+    keywords_hash = content_hash(keywords)
+    with _registry_lock:
+        index = _index_registry.get(keywords_hash)
+    if index is not None:
+        return index
+
+    cached_terms = _load_cached_terms(keywords_hash)
+    index = KeywordIndex(keywords, previous, cached_terms)
+    if cached_terms is None:
+        _save_cached_terms(index)
+
+    with _registry_lock:
+        return _index_registry.setdefault(keywords_hash, index)
+
+def _load_cached_terms(keywords_hash: str) -> Optional[Dict[Tuple[str, str], Tuple[str, List[str]]]]:
+    # На диске хранятся только списки терминов в JSON: автомат или дерево строится заново
+    cache_path = _index_cache_path(keywords_hash)
+    data = read_json(cache_path)
+    if not isinstance(data, dict) or data.get('content_hash') != keywords_hash:
+        return None
+
+    try:
+        cached_terms = {(category, subcategory): (terms_hash, [str(term) for term in terms])
+                        for category, subcategory, terms_hash, terms in data['subcategories']}
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Поврежденный кэш индекса ключевых слов {cache_path.name}: {e}")
+        return None
+
+    logger.info(f"Термины индекса ключевых слов загружены из кэша: {cache_path.name}")
+    return cached_terms
+
+def _save_cached_terms(index: KeywordIndex) -> None:
+    data = {
+        'content_hash': index.content_hash,
+        'subcategories': [[category, subcategory, terms_hash, terms]
+                          for (category, subcategory), (terms_hash, terms) in index.subcategory_terms.items()]
+    }
+    if write_json_atomic(_index_cache_path(index.content_hash), data):
+        _prune_index_cache()
+
+def _prune_index_cache() -> None:
+    # Остаются INDEX_CACHE_ENTRIES последних файлов текущего формата, файлы прежних
+    # форматов (в том числе .pkl) удаляются. Временные файлы записи не трогаем
+    try:
+        entries = sorted((path for path in _index_cache_dir().iterdir() if path.suffix in ('.json', '.pkl')),
+                         key=lambda path: path.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+
+    current = [path for path in entries if path.name.startswith(f"v{INDEX_FORMAT_VERSION}-") and path.suffix == '.json']
+    stale = current[INDEX_CACHE_ENTRIES:] + [path for path in entries if path not in current]
+    for path in stale:
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.warning(f"Не удалось удалить устаревший кэш индекса {path.name}: {e}")
+
+class KeywordStream:
+
+    def __init__(self, index: Union[KeywordIndex, KeywordOverlay]):
+        # Поиск по нормализованному тексту, который поступает частями. Совпадения
+        # и их выбор внутри подкатегорий совпадают с KeywordIndex.find_matches по всему тексту:
+        # совпадение принимается, только когда известен символ после него (не дальше последнего
+        # пробела), а от уже просмотренного текста хранится хвост длиной в самый длинный термин
+        self.index = index
+        self._max_term_length = index.max_term_length()
+
+        self._text = ''
+        self._offset = 0
+        self._accepted_until = 0
+        self._pending_space = ''
+        self._started = False
+        self._finished = False
+
+        # Подкатегория -> совпадения, еще не прошедшие выбор без перекрытий
+        self._spans: Dict[Tuple[str, str], List[Tuple[int, int, str]]] = {}
+        self._last_end: Dict[Tuple[str, str], int] = {}
+        self._found: Dict[Tuple[str, str], Dict[str, None]] = {}
+
+    def feed(self, chunk: str) -> None:
+        # Части не должны разрывать серию пробелов исходного текста,
+        # иначе нормализация по частям отличается от нормализации целиком
+        if not self._started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return
+            self._started = True
+
+        # Пробелы в конце придерживаются: в конце всего текста они отбрасываются, как в strip()
+        content = chunk.rstrip()
+        if not content:
+            self._pending_space += chunk
+            return
+
+        self._text += self._pending_space + content
+        self._pending_space = chunk[len(content):]
+
+        last_space = self._text.rfind(' ')
+        if last_space >= 0:
+            self._scan(self._offset + last_space, final=False)
+
+    def finish(self) -> None:
+        # Конец текста: принимаются все оставшиеся совпадения
+        if not self._finished:
+            self._scan(self._offset + len(self._text), final=True)
+            self._finished = True
+
+    def stop(self) -> None:
+        # Досрочная остановка: выбираются уже принятые совпадения, остаток текста не просматривается
+        if not self._finished:
+            self._select(None)
+            self._finished = True
+
+    def _scan(self, limit: int, final: bool) -> None:
+        if limit > self._accepted_until:
+            for start, end, matched, owners in self.index.iter_owned_matches(self._text):
+                end += self._offset
+                if self._accepted_until < end <= limit:
+                    for owner in owners:
+                        self._spans.setdefault(owner, []).append((start + self._offset, end, matched))
+            self._accepted_until = limit
+
+        # Совпадения, начинающиеся раньше, найдены все: следующее совпадение закончится
+        # после limit, а его термин не длиннее самого длинного
+        self._select(None if final else limit - self._max_term_length + 1)
+
+        keep = max(0, limit - self._max_term_length - 1 - self._offset)
+        self._text = self._text[keep:]
+        self._offset += keep
+
+    def _select(self, before: Optional[int]) -> None:
+        # Выбор как в find_matches: по началу, из совпадений с одного места - самое длинное
+        for owner, spans in self._spans.items():
+            if not spans:
+                continue
+
+            spans.sort(key=lambda span: (span[0], -span[1]))
+            ready = len(spans) if before is None else next(
+                (i for i, span in enumerate(spans) if span[0] >= before), len(spans))
+
+            last_end = self._last_end.get(owner, 0)
+            found = self._found.setdefault(owner, {})
+            for start, end, matched in spans[:ready]:
+                if start >= last_end:
+                    found[matched] = None
+                    last_end = end
+            self._last_end[owner] = last_end
+            del spans[:ready]
+
+    @property
+    def position(self) -> int:
+        # Число поступивших символов нормализованного текста (без придержанных пробелов)
+        return self._offset + len(self._text)
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        # Число разных найденных ключевых слов по подкатегориям (только выбранные совпадения)
+        return {owner: len(found) for owner, found in self._found.items() if found}
+
+    def matches(self) -> Dict[str, Dict[str, List[str]]]:
+        matches = {}
+        for owner in self.index.subcategories:
+            found = self._found.get(owner)
+            if found:
+                category, subcategory = owner
+                matches.setdefault(category, {})[subcategory] = list(found)
+        return matches
@@ -0,0 +1,100 @@
+import os
+import threading
+import logging
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+# 'closed' - закрытие после записи, в отличие от 'closed_no_write'
+WRITE_EVENTS = {'modified', 'created', 'moved', 'closed'}
+
+class KeywordFileWatcher(FileSystemEventHandler):
+
+    def __init__(self, path: Union[str, Path], callback: Callable[[], None],
+                 debounce: float = 0.5, poll_interval: float = 2.0):
+        # Редакторы сохраняют файл в несколько шагов (запись, переименование),
+        # поэтому callback вызывается один раз спустя debounce секунд после последнего события
+        self.path = os.path.normcase(os.path.abspath(path))
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(self, os.path.dirname(self.path), recursive=False)
+            self._observer.start()
+            logger.info(f"Отслеживание изменений {self.path} (watchdog)")
+        else:
+            # Без watchdog проверяем время изменения файла
+            self._poll_thread = threading.Thread(target=self._poll, name='keyword-watcher', daemon=True)
+            self._poll_thread.start()
+            logger.info(f"Отслеживание изменений {self.path} (опрос каждые {self.poll_interval} с)")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def on_any_event(self, event) -> None:
+        # Только события записи: открытие и закрытие без записи порождает само чтение файла
+        # при перезагрузке, и реакция на них зациклила бы перезагрузки
+        if event.is_directory or event.event_type not in WRITE_EVENTS:
+            return
+        # При переименовании (сохранение через временный файл) важен итоговый путь
+        path = event.dest_path if event.event_type == 'moved' else event.src_path
+        if path and os.path.normcase(os.path.abspath(path)) == self.path:
+            self._schedule()
+
+    def _poll(self) -> None:
+        last_mtime = self._mtime()
+        while not self._stopped.wait(self.poll_interval):
+            mtime = self._mtime()
+            if mtime != last_mtime:
+                last_mtime = mtime
+                self._schedule()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _schedule(self) -> None:
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self) -> None:
+        try:
+            self.callback()
+        except Exception as e:
+            logger.error(f"Ошибка обработки изменения {self.path}: {e}")
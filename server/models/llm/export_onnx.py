@@ -0,0 +1,139 @@
+import sys
+import json
+import shutil
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import onnx
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm.transformer_classifer import TransformerClassifier
+
+logger = logging.getLogger(__name__)
+
+ONNX_INPUTS = ['input_ids', 'attention_mask', 'token_type_ids']
+
+class _LogitsOnly(torch.nn.Module):
+    # Граф с одним выходом logits вместо объекта SequenceClassifierOutput
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                          token_type_ids=token_type_ids).logits
+
+def export_onnx(model_path: Optional[str] = None, output_path: Optional[str] = None,
+                optimize: bool = False, quantize: bool = False, opset: int = 17) -> Path:
+    # Экспорт в ONNX с динамическими осями пакета и длины последовательности.
+    # optimize - слияние операций BERT (внимание, LayerNorm, GELU) оптимизатором onnxruntime,
+    # quantize - динамическое квантование весов MatMul в int8
+    classifier = TransformerClassifier(model_path)
+    # Явные операции внимания вместо SDPA: их распознает оптимизатор onnxruntime
+    if hasattr(classifier.model, 'set_attn_implementation'):
+        classifier.model.set_attn_implementation('eager')
+    output_path = Path(output_path) if output_path else classifier.model_path / 'model.onnx'
+
+    sample = classifier.tokenizer(['пример текста на экране', 'sample'], padding=True, return_tensors='pt')
+    inputs = tuple(sample[name] if name in sample else torch.zeros_like(sample['input_ids'])
+                   for name in ONNX_INPUTS)
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ONNX_INPUTS}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        current = Path(temp_dir) / 'model.onnx'
+        torch.onnx.export(
+            _LogitsOnly(classifier.model).eval(),
+            inputs,
+            str(current),
+            input_names=ONNX_INPUTS,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+        logger.info(f"Граф ONNX экспортирован, opset {opset}")
+
+        if optimize:
+            from onnxruntime.transformers.optimizer import optimize_model
+
+            config = classifier.model.config
+            optimized = optimize_model(str(current), model_type='bert',
+                                       num_heads=config.num_attention_heads, hidden_size=config.hidden_size)
+            current = Path(temp_dir) / 'model.opt.onnx'
+            optimized.save_model_to_file(str(current))
+            logger.info(f"Граф оптимизирован: {optimized.get_fused_operator_statistics()}")
+
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            quantized = Path(temp_dir) / 'model.int8.onnx'
+            # Для операций onnxruntime после оптимизации вывод типов не работает, тип по умолчанию - float
+            quantize_dynamic(str(current), str(quantized), weight_type=QuantType.QInt8,
+                             extra_options={'DefaultTensorType': onnx.TensorProto.FLOAT})
+            current = quantized
+            logger.info("Веса графа квантованы в int8")
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(current), str(output_path))
+
+    logger.info(f"Модель ONNX сохранена: {output_path}")
+    return output_path
+
+def check_parity(model_path: Optional[str], onnx_path: str, texts: List[str],
+                 batch_size: int = 16) -> Dict[str, Any]:
+    # Сравнение onnxruntime с torch на одних и тех же текстах (пакетами, с дополнением)
+    torch_classifier = TransformerClassifier(model_path)
+    onnx_classifier = TransformerClassifier(model_path, backend='onnx', onnx_path=onnx_path)
+
+    torch_results = torch_classifier.classify_batch(texts, batch_size)
+    onnx_results = onnx_classifier.classify_batch(texts, batch_size)
+
+    differences = [np.abs(np.array(a.logits) - np.array(b.logits)).max()
+                   for a, b in zip(torch_results, onnx_results)]
+    agreement = sum(a.category_id == b.category_id for a, b in zip(torch_results, onnx_results))
+
+    return {
+        'texts': len(texts),
+        'max_logit_diff': float(max(differences, default=0.0)),
+        'mean_logit_diff': float(np.mean(differences)) if differences else 0.0,
+        'category_agreement': agreement / len(texts) if texts else 1.0
+    }
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Экспорт классификатора в ONNX')
+    parser.add_argument('--model', type=str, help='Каталог модели (по умолчанию llm/trained_model)')
+    parser.add_argument('--output', type=str, help='Файл ONNX (по умолчанию <модель>/model.onnx)')
+    parser.add_argument('--optimize', action='store_true', help='Оптимизировать граф для BERT')
+    parser.add_argument('--quantize', action='store_true', help='Квантовать веса в int8')
+    parser.add_argument('--opset', type=int, default=17, help='Версия opset ONNX')
+    parser.add_argument('--parity-dataset', type=str, default=str(Path(__file__).parent / 'dataset' / 'test.json'),
+                        help='JSON с текстами для сравнения с torch')
+    parser.add_argument('--tolerance', type=float, default=1e-3,
+                        help='Допустимое расхождение логитов без квантования')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    onnx_path = export_onnx(args.model, args.output, args.optimize, args.quantize, args.opset)
+
+    with open(args.parity_dataset, 'r', encoding='utf-8') as f:
+        texts = [sample['text'] for sample in json.load(f)]
+
+    parity = check_parity(args.model, str(onnx_path), texts)
+    print(json.dumps(parity, ensure_ascii=False, indent=2))
+
+    # Квантованный граф сравнивается только по совпадению категорий
+    if not args.quantize and parity['max_logit_diff'] > args.tolerance:
+        print(f"Расхождение с torch больше допустимого ({args.tolerance})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import io
+import re
+import sys
 import torch
 import json
+import transformers
+import hashlib
 from pathlib import Path
 from transformers import (
     AutoTokenizer, 
@@ -8,12 +13,25 @@ from transformers import (
     BertTokenizer,
     BertForSequenceClassification
 )
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
-from dataclasses import dataclass
+
+try:
+    from transformers.initialization import no_init_weights
+except ImportError:
+    from transformers.modeling_utils import no_init_weights
+from dataclasses import dataclass, replace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memo_cache import MemoCache, text_key
+from cache_utils import get_cache_dir, read_json, write_json_atomic, write_bytes_atomic
 
 logger = logging.getLogger(__name__)
 
+# Пробельные символы BERT-токенизатора (пробел, \t, \n, \r и категория Zs)
+_TOKENIZER_WHITESPACE = re.compile('[ \t\n\r\u00a0\u1680\u2000-\u200a\u202f\u205f\u3000]+')
+
 @dataclass
 class TransformerClassificationResult:
     category: str
@@ -23,15 +41,33 @@ class TransformerClassificationResult:
 
 class TransformerClassifier:
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, num_threads: Optional[int] = None,
+                 memo_cache: Optional[MemoCache] = None, quantize: Optional[str] = None,
+                 backend: str = 'torch', onnx_path: Optional[str] = None):
         if model_path is None:
             model_path = Path(__file__).parent / "trained_model"
         else:
             model_path = Path(model_path)
         
+        if quantize not in (None, 'int8'):
+            raise ValueError(f"Неподдерживаемый режим квантования: {quantize}")
+        if backend not in ('torch', 'onnx'):
+            raise ValueError(f"Неподдерживаемый backend: {backend}")
+        if backend == 'onnx' and quantize:
+            raise ValueError("Для ONNX квантование выполняется при экспорте (export_onnx.py --quantize)")
+        
         self.model_path = model_path
+        self.max_length = 128
+        # quantize='int8' - динамическое квантование Linear (только CPU)
+        self.quantize = quantize
+        # backend='onnx' - граф из export_onnx.py через onnxruntime на CPU
+        self.backend = backend
+        self.onnx_path = Path(onnx_path) if onnx_path else model_path / 'model.onnx'
+        self.onnx_session = None
+        # Кэш результатов по нормализованному тексту (None - отключен)
+        self.memo_cache = memo_cache
 
-        required_files = ['config.json', 'pytorch_model.bin']
+        required_files = ['config.json', 'pytorch_model.bin'] if backend == 'torch' else ['config.json']
         for file in required_files:
             if not (model_path / file).exists():
                 raise FileNotFoundError(f"Не найден файл: {model_path / file}")
@@ -41,6 +77,39 @@ class TransformerClassifier:
         
         logger.info(f"Загрузка модели из {model_path}")
         
+        self.weights_version = self._weights_version()
+        
+        self.model = self._load_quantized_artifact() if quantize == 'int8' else None
+        if self.model is not None or backend == 'onnx':
+            self.tokenizer = AutoTokenizer.from_pretrained(str(model_path))
+        else:
+            self._load_model(model_path)
+            # Загрузчик мог дописать config.json
+            self.weights_version = self._weights_version()
+            if quantize == 'int8':
+                self.model = self._quantize_int8(self.model)
+
+        self.device = torch.device("cuda" if torch.cuda.is_available() and not quantize and backend == 'torch' else "cpu")
+        if self.model is not None:
+            self.model.to(self.device)
+            self.model.eval()
+        
+        self.num_threads = torch.get_num_threads()
+        if num_threads:
+            self.set_num_threads(num_threads)
+        elif backend == 'onnx':
+            self._create_onnx_session()
+        
+        logger.info(f"Модель загружена на {self.device}")
+
+        self.id_to_category = self.config.get("id2label", 
+            {0: "harmful", 1: "neutral", 2: "non_work", 3: "work"})
+        self.category_to_id = self.config.get("label2id",
+            {"harmful": 0, "neutral": 1, "non_work": 2, "work": 3})
+        
+        self.weights_version = self._weights_version()
+    
+    def _load_model(self, model_path: Path) -> None:
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(str(model_path))
 
@@ -106,57 +175,212 @@ class TransformerClassifier:
             except Exception as e2:
                 logger.error(f"Загрузка как BERT тоже не удалась: {e2}")
                 raise RuntimeError(f"Не удалось загрузить модель: {e2}")
-
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
+    
+    def _create_onnx_session(self) -> None:
+        import onnxruntime
         
-        logger.info(f"Модель загружена на {self.device}")
-
-        self.id_to_category = self.config.get("id2label", 
-            {0: "harmful", 1: "neutral", 2: "non_work", 3: "work"})
-        self.category_to_id = self.config.get("label2id",
-            {"harmful": 0, "neutral": 1, "non_work": 2, "work": 3})
+        if not self.onnx_path.exists():
+            raise FileNotFoundError(f"Не найден файл: {self.onnx_path} (создается llm/export_onnx.py)")
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.onnx_session = onnxruntime.InferenceSession(str(self.onnx_path), options,
+                                                         providers=['CPUExecutionProvider'])
+        self.onnx_inputs = [graph_input.name for graph_input in self.onnx_session.get_inputs()]
+        logger.info(f"Граф ONNX загружен: {self.onnx_path}")
+    
+    def _forward(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        # Логиты пакета через выбранный backend
+        if self.onnx_session is not None:
+            feeds = {name: inputs[name].numpy() if name in inputs else torch.zeros_like(inputs['input_ids']).numpy()
+                     for name in self.onnx_inputs}
+            return torch.from_numpy(self.onnx_session.run(['logits'], feeds)[0])
+        
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.inference_mode():
+            return self.model(**inputs).logits
+    
+    def _quantized_artifact_dir(self) -> Path:
+        # Готовая int8-модель хранится в каталоге кэша, отдельно для каждой версии весов
+        return get_cache_dir() / 'quantized' / self.weights_version[:32]
+    
+    def _quantized_meta(self) -> Dict[str, Any]:
+        # Артефакт действителен для тех же весов, версий torch и transformers и движка квантования
+        return {
+            'weights_version': self.weights_version,
+            'torch': torch.__version__,
+            'transformers': transformers.__version__,
+            'engine': torch.backends.quantized.engine
+        }
+    
+    def _load_quantized_artifact(self) -> Optional[torch.nn.Module]:
+        artifact_dir = self._quantized_artifact_dir()
+        if read_json(artifact_dir / 'meta.json') != self._quantized_meta():
+            return None
+        
+        try:
+            # Хранится только state_dict: модель строится по config.json (без случайной
+            # инициализации весов) и квантуется заново, после чего загружаются готовые int8-веса
+            config = AutoConfig.from_pretrained(str(self.model_path))
+            with no_init_weights():
+                model = AutoModelForSequenceClassification.from_config(config)
+            model.eval()
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            state_dict = torch.load(artifact_dir / 'model.pt', map_location='cpu', weights_only=True)
+            model.load_state_dict(state_dict)
+            logger.info(f"Загружена int8-модель из {artifact_dir}")
+            return model
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить int8-модель из {artifact_dir}: {e}")
+            return None
+    
+    def _quantize_int8(self, model: torch.nn.Module) -> torch.nn.Module:
+        # Динамическое квантование: веса Linear хранятся в int8, активации квантуются на лету
+        model.eval()
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        logger.info("Модель квантована в int8")
+        
+        artifact_dir = self._quantized_artifact_dir()
+        buffer = io.BytesIO()
+        torch.save(quantized.state_dict(), buffer)
+        if write_bytes_atomic(artifact_dir / 'model.pt', buffer.getvalue()):
+            write_json_atomic(artifact_dir / 'meta.json', self._quantized_meta())
+        return quantized
+    
+    def _weights_version(self) -> str:
+        # Отпечаток загруженных весов: путь, размер и время изменения файлов модели
+        digest = hashlib.sha256(str(self.model_path.resolve()).encode('utf-8'))
+        paths = [self.model_path / name for name in ('config.json', 'pytorch_model.bin', 'model.safetensors')]
+        if self.backend == 'onnx':
+            paths.append(self.onnx_path)
+        for path in paths:
+            if path.exists():
+                stat = path.stat()
+                digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _memo_version(self) -> str:
+        # Версия записей кэша: веса модели и режим инференса
+        return f"{self.weights_version}:{self.backend}:{self.device}:{self.max_length}:{self.quantize or 'fp32'}"
+    
+    def set_num_threads(self, num_threads: int) -> None:
+        # Число потоков intra-op у torch общее для всего процесса
+        num_threads = max(1, num_threads)
+        torch.set_num_threads(num_threads)
+        self.num_threads = num_threads
+        if self.backend == 'onnx':
+            # Число потоков onnxruntime задается при создании сессии
+            self._create_onnx_session()
+        logger.info(f"Потоков инференса: {num_threads}")
+    
+    def _memo_key(self, text: str) -> str:
+        # Токенизатор делит текст по пробельным символам, поэтому их серии не влияют на результат
+        return text_key(self._memo_version(), _TOKENIZER_WHITESPACE.sub(' ', text).strip(' '))
+    
+    def _build_result(self, logits: torch.Tensor) -> TransformerClassificationResult:
+        # Результат по логитам одного текста
+        probabilities = torch.softmax(logits, dim=-1)
+        predicted_id = torch.argmax(probabilities, dim=-1).item()
+        confidence = probabilities[predicted_id].item()
+        category = self.id_to_category.get(str(predicted_id), "neutral")
+        
+        return TransformerClassificationResult(
+            category=category,
+            confidence=confidence,
+            category_id=predicted_id,
+            logits=logits.cpu().tolist()
+        )
+    
+    def _error_result(self) -> TransformerClassificationResult:
+        return TransformerClassificationResult(
+            category="neutral",
+            confidence=0.0,
+            category_id=1,
+            logits=[0, 0, 0, 0]
+        )
     
     def classify(self, text: str) -> TransformerClassificationResult:
+        memo_key = None
+        if self.memo_cache is not None:
+            memo_key = self._memo_key(text)
+            cached = self.memo_cache.get(memo_key)
+            if cached is not None:
+                return replace(cached)
+        
         try:
             inputs = self.tokenizer(
                 text,
                 truncation=True,
                 padding=True,
-                max_length=128,
+                max_length=self.max_length,
                 return_tensors="pt"
             )
             
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.softmax(logits, dim=-1)
+            result = self._build_result(self._forward(inputs)[0])
             
-            predicted_id = torch.argmax(probabilities, dim=-1).item()
-            confidence = probabilities[0][predicted_id].item()
-            category = self.id_to_category.get(str(predicted_id), "neutral")
-            
-            result = TransformerClassificationResult(
-                category=category,
-                confidence=confidence,
-                category_id=predicted_id,
-                logits=logits[0].cpu().tolist()
-            )
-            
-            logger.debug(f"Transformer: {category} (уверенность: {confidence:.3f})")
+            logger.debug(f"Transformer: {result.category} (уверенность: {result.confidence:.3f})")
+            if memo_key is not None:
+                self.memo_cache.put(memo_key, replace(result))
             return result
             
         except Exception as e:
             logger.error(f"Ошибка классификации: {e}")
-            return TransformerClassificationResult(
-                category="neutral",
-                confidence=0.0,
-                category_id=1,
-                logits=[0, 0, 0, 0]
+            return self._error_result()
+    
+    def classify_batch(self, texts: List[str], batch_size: int = 32) -> List[TransformerClassificationResult]:
+        # Тексты сортируются по числу токенов и делятся на пакеты близкой длины,
+        # каждый пакет дополняется только до своего самого длинного текста.
+        # Результаты возвращаются в порядке texts
+        results: List[Optional[TransformerClassificationResult]] = [None] * len(texts)
+        
+        memo_keys = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if self.memo_cache is not None:
+                memo_keys[i] = self._memo_key(text)
+                cached = self.memo_cache.get(memo_keys[i])
+                if cached is not None:
+                    results[i] = replace(cached)
+                    continue
+            pending.append(i)
+        
+        if not pending:
+            return results
+        
+        try:
+            encodings = self.tokenizer(
+                [texts[i] for i in pending],
+                truncation=True,
+                max_length=self.max_length
             )
+        except Exception as e:
+            logger.error(f"Ошибка токенизации пакета: {e}")
+            for i in pending:
+                results[i] = self._error_result()
+            return results
+        
+        features = [{key: encodings[key][position] for key in encodings.keys()} for position in range(len(pending))]
+        order = sorted(range(len(pending)), key=lambda position: len(features[position]['input_ids']))
+        
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            try:
+                inputs = self.tokenizer.pad([features[position] for position in bucket], return_tensors="pt")
+                logits = self._forward(inputs)
+                
+                for row, position in enumerate(bucket):
+                    i = pending[position]
+                    results[i] = self._build_result(logits[row])
+                    if memo_keys[i] is not None:
+                        self.memo_cache.put(memo_keys[i], replace(results[i]))
+                        
+            except Exception as e:
+                logger.error(f"Ошибка классификации пакета: {e}")
+                for position in bucket:
+                    results[pending[position]] = self._error_result()
+        
+        return results
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
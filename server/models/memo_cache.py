@@ -0,0 +1,94 @@
+import sys
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def text_key(version: str, *parts: Any) -> str:
+    # Ключ результата: версия (хеш ключевых слов или весов модели) и нормализованный текст
+    # с параметрами, от которых зависит результат. Текст в кэше не хранится
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(version.encode('utf-8'))
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+def approximate_size(value: Any) -> int:
+    # Примерный размер значения в памяти вместе с вложенными строками и списками
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if is_dataclass(value):
+        return sys.getsizeof(value) + sum(approximate_size(getattr(value, field.name)) for field in fields(value))
+    if hasattr(type(value), '__slots__'):
+        return sys.getsizeof(value) + sum(approximate_size(getattr(value, name, None)) for name in type(value).__slots__)
+    return sys.getsizeof(value)
+
+class MemoCache:
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Ключ -> (результат, размер), от давно использованных к недавним
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        size = approximate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
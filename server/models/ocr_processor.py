@@ -1,40 +1,302 @@
+import io
 import os
+import asyncio
 import sys
 import subprocess
-import tempfile
+import time
+import threading
 import platform
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union, Iterable, Iterator, Tuple
 import logging
 
 import cv2
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter, ImageDraw, ImageFont
-import pytesseract
+from PIL import Image
+
+from tesseract_pool import TesseractEnginePool
+from cache_utils import get_cache_dir, read_json, write_json_atomic
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DISCOVERY_CACHE_FILE = 'tesseract_discovery.json'
+
+# Поля bounding_boxes (имена столбцов TSV-вывода Tesseract)
+BOX_KEYS = ('text', 'left', 'top', 'width', 'height', 'conf', 'block_num', 'par_num', 'line_num')
+
 class OCRProcessor:
     
-    def __init__(self, tesseract_path: Optional[str] = None):
+    def __init__(self, tesseract_path: Optional[str] = None, backend: str = 'auto',
+                 pool_size: Optional[int] = None):
         self.os_type = platform.system().lower()
-        self.tesseract_path = self._find_tesseract(tesseract_path)
-        self.tessdata_path = self._find_tessdata()
-        
-        pytesseract.pytesseract.tesseract_cmd = self.tesseract_path
-        
-        logger.info(f"OCRProcessor инициализирован для {self.os_type}")
-        logger.info(f"Tesseract путь: {self.tesseract_path}")
-        logger.info(f"Tessdata путь: {self.tessdata_path}")
-        
+
+        # Предобработка целиком на массивах numpy/OpenCV:
+        # оттенки серого -> масштаб -> шумоподавление -> контраст -> резкость -> бинаризация
         self.preprocessing_config = {
             'resize_factor': 1.5,
+            # Увеличиваем только небольшие изображения: крупные скриншоты и так читаются хорошо,
+            # а время распознавания растет вместе с числом пикселей
+            'max_upscale_pixels': 2_000_000,
+            'denoise_method': 'none',  # 'none', 'median', 'nlmeans'
             'denoise_strength': 5,
             'contrast_factor': 1.3,
             'sharpness_factor': 1.1,
-            'binary_threshold': 160
+            'binarization': 'none',  # 'none', 'fixed', 'otsu', 'adaptive'
+            'binary_threshold': 160,
+            'adaptive_block_size': 31,
+            'adaptive_c': 10
+        }
+
+        # Параметры распознавания: слова с уверенностью ниже порога не попадают в 'text'
+        # (остаются в 'raw_text' и 'bounding_boxes')
+        self.recognition_config = {
+            'min_word_confidence': 30,
+            # 'auto' - PSM выбирается по статистике изображения, иначе номер режима Tesseract
+            'psm': 'auto',
+            'oem': 3,
+            # Таймаут одного запуска Tesseract, если вызывающий не задал свой
+            'timeout': 30,
+            # Без словарей быстрее и точнее для имен файлов, кода и URL
+            'disable_dictionaries': False
+        }
+
+        # Автовыбор PSM: изображение уменьшается в analysis_scale раз (строки текста
+        # экранного размера остаются различимы), по маске границ символов оцениваются
+        # плотность текста, число строк и колонки
+        self.layout_config = {
+            'analysis_scale': 0.25,
+            'min_contrast': 32,
+            'min_line_height': 2,
+            'sparse_density': 0.05,
+            'column_gap': 0.06,
+            'modes': {
+                'empty': (11, 3),
+                'line': (7, 3),
+                'sparse': (11, 3),
+                'block': (6, 3),
+                'columns': (3, 3)
+            }
+        }
+
+        # Выбор языка до распознавания: явный lang используется как есть,
+        # иначе 'probe' определяет письменность по центральной области,
+        # 'static' сразу распознаёт всеми языками-кандидатами
+        self.language_routing_config = {
+            'mode': 'probe',
+            'candidates': ['eng', 'rus'],
+            'script_languages': {'Latin': 'eng', 'Cyrillic': 'rus'},
+            'probe_size': (800, 400),
+            'probe_min_chars': 20,
+            'dominance': 0.9
+        }
+
+        # Пул процессов для пакетной обработки создается при первом вызове
+        self._batch_executor: Optional[ProcessPoolExecutor] = None
+        self._batch_executor_workers = 0
+        self._batch_executor_settings: Optional[Dict[str, Any]] = None
+        self.last_batch_stats: Dict[str, Any] = {}
+
+        # Ограничения асинхронного API: число одновременных распознаваний и таймаут процесса
+        self.async_config = {
+            'max_concurrency': os.cpu_count() or 1,
+            'timeout': 30
+        }
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_semaphore_loop = None
+
+        # Доля CPU для OCR (задается ResourceManager): число одновременных распознаваний
+        # и OMP_THREAD_LIMIT для процессов tesseract. None - без ограничений
+        self.resource_config = {
+            'max_workers': None,
+            'omp_thread_limit': None
+        }
+
+        # Инкрементальный режим: повторно распознаются только изменившиеся полосы кадра.
+        # Полоса во всю ширину кадра высотой band_height (строки не разрезаются по горизонтали)
+        # распознается с перекрытием overlap сверху и снизу, строка достается полосе,
+        # в которую попал ее центр. Полоса считается изменившейся, если доля пикселей
+        # с разницей яркости больше pixel_delta превышает min_changed_fraction
+        self.incremental_config = {
+            'band_height': 360,
+            'overlap': 64,
+            'pixel_delta': 24,
+            'min_changed_fraction': 0.001,
+            'max_sessions': 64
+        }
+        self._incremental_sessions: 'OrderedDict[Any, Dict[str, Any]]' = OrderedDict()
+        self._incremental_lock = threading.Lock()
+
+        # Поиск областей с текстом (морфологический градиент) и распознавание только их.
+        # Если области занимают больше max_coverage кадра, распознается весь кадр
+        self.text_region_config = {
+            'enabled': False,
+            'connect_kernel': (17, 3),
+            'min_area': 120,
+            'min_height': 8,
+            'max_height': 200,
+            'min_fill': 0.1,
+            'padding': 4,
+            'gap': 12,
+            'max_coverage': 0.6
+        }
+
+        # Параллельное распознавание больших кадров: изображение от min_pixels пикселей
+        # делится на панели мониторов (по соотношению сторон monitor_aspect) и горизонтальные
+        # полосы с перекрытием overlap. Строка достается части, в ядро которой попал ее центр
+        self.parallel_config = {
+            'min_pixels': 6_000_000,
+            'max_workers': None,
+            'monitor_aspect': 16 / 9,
+            'min_strip_height': 360,
+            'overlap': 80
+        }
+
+        # Поиск Tesseract запускает процессы через _run_subprocess_hidden,
+        # которому уже нужны resource_config и остальные параметры
+        self._discover_tesseract(tesseract_path)
+        
+        # 'subprocess' - новый процесс tesseract на каждое изображение,
+        # 'pool' - пул прогретых движков в процессе (tesserocr),
+        # 'auto' - пул, если tesserocr доступен
+        self.engine_pool = self._create_engine_pool(backend, pool_size)
+        self.backend = 'pool' if self.engine_pool else 'subprocess'
+        
+        logger.info(f"OCRProcessor инициализирован для {self.os_type}")
+        logger.info(f"Tesseract путь: {self.tesseract_path}")
+        logger.info(f"Tessdata путь: {self.tessdata_path}")
+        logger.info(f"Режим OCR: {self.backend}")
+
+    def _discover_tesseract(self, custom_path: Optional[str]) -> None:
+        # Результат поиска Tesseract кэшируется на диске и действителен,
+        # пока не изменились исполняемый файл и каталог tessdata
+        self._discovery_key = f"{self.os_type}:{custom_path or ''}"
+        entry = self._load_discovery_entry()
+
+        if entry is not None:
+            self.tesseract_path = entry['tesseract_path']
+            self.tessdata_path = Path(entry['tessdata_path']) if entry['tessdata_path'] else None
+            self.available_languages = entry['languages']
+            self._discovery_entry = entry
+            logger.info("Параметры Tesseract загружены из кэша")
+            return
+
+        self.tesseract_path = self._find_tesseract(custom_path)
+        self.tessdata_path = self._find_tessdata()
+        self.available_languages = self._list_tessdata_languages()
+
+        self._discovery_entry = {
+            'tesseract_path': self.tesseract_path,
+            'mtime': self._path_mtime(self.tesseract_path),
+            'tessdata_path': str(self.tessdata_path) if self.tessdata_path else None,
+            'tessdata_mtime': self._path_mtime(self.tessdata_path),
+            'languages': self.available_languages
         }
+        self._save_discovery_entry()
+
+    @staticmethod
+    def discovery_cache_path() -> Path:
+        return get_cache_dir() / DISCOVERY_CACHE_FILE
+
+    @staticmethod
+    def invalidate_discovery_cache() -> None:
+        try:
+            OCRProcessor.discovery_cache_path().unlink()
+            logger.info("Кэш параметров Tesseract очищен")
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _path_mtime(path) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime if path else None
+        except OSError:
+            return None
+
+    def _load_discovery_entry(self) -> Optional[Dict[str, Any]]:
+        # Поврежденная или устаревшая по формату запись считается промахом: Tesseract ищется заново
+        entries = self._discovery_cache_entries(read_json(self.discovery_cache_path()))
+        entry = entries.get(self._discovery_key)
+        if not isinstance(entry, dict):
+            return None
+
+        tesseract_path = entry.get('tesseract_path')
+        tessdata_path = entry.get('tessdata_path')
+        languages = entry.get('languages')
+        if (not isinstance(tesseract_path, str) or not isinstance(tessdata_path, (str, type(None)))
+                or not isinstance(languages, list) or not all(isinstance(l, str) for l in languages)):
+            return None
+
+        binary_mtime = self._path_mtime(tesseract_path)
+        if binary_mtime is None or binary_mtime != entry.get('mtime'):
+            return None
+        if self._path_mtime(tessdata_path) != entry.get('tessdata_mtime'):
+            return None
+
+        return entry
+
+    @staticmethod
+    def _discovery_cache_entries(cache: Any) -> Dict[str, Any]:
+        entries = cache.get('entries') if isinstance(cache, dict) else None
+        return entries if isinstance(entries, dict) else {}
+
+    def _save_discovery_entry(self) -> None:
+        entries = self._discovery_cache_entries(read_json(self.discovery_cache_path()))
+        entries[self._discovery_key] = self._discovery_entry
+        write_json_atomic(self.discovery_cache_path(), {'entries': entries})
+
+    def _create_engine_pool(self, backend: str, pool_size: Optional[int]) -> Optional[TesseractEnginePool]:
+        if backend not in ('auto', 'pool', 'subprocess'):
+            raise ValueError(f"Неизвестный режим OCR: {backend}")
+        
+        if backend == 'subprocess':
+            return None
+        
+        if not TesseractEnginePool.is_available():
+            if backend == 'pool':
+                logger.warning("tesserocr не установлен, используется запуск tesseract в отдельном процессе")
+            return None
+        
+        if not self.tessdata_path:
+            logger.warning("Пул движков требует tessdata, используется запуск tesseract в отдельном процессе")
+            return None
+        
+        try:
+            return TesseractEnginePool(self.tessdata_path, size=pool_size)
+        except Exception as e:
+            logger.warning(f"Не удалось создать пул движков Tesseract: {e}")
+            return None
+    
+    def close(self) -> None:
+        if self.engine_pool:
+            self.engine_pool.close()
+            self.engine_pool = None
+            self.backend = 'subprocess'
+        self._shutdown_batch_executor()
+
+    def apply_cpu_allocation(self, max_workers: int, omp_thread_limit: int) -> None:
+        self.resource_config['max_workers'] = max_workers
+        self.resource_config['omp_thread_limit'] = omp_thread_limit
+        self.async_config['max_concurrency'] = max_workers
+        # Семафор пересоздается с новым лимитом при следующем вызове
+        self._async_semaphore = None
+
+        # Движки пула работают в этом процессе, поэтому OMP_THREAD_LIMIT к ним не применить
+        # без влияния на torch - ограничиваем число одновременно занятых движков
+        if self.engine_pool:
+            self.engine_pool.resize(max_workers)
+
+        logger.info(f"Бюджет OCR: {max_workers} распознаваний, OMP_THREAD_LIMIT={omp_thread_limit}")
+
+    def _tesseract_env(self) -> Optional[Dict[str, str]]:
+        limit = self.resource_config['omp_thread_limit']
+        if not limit:
+            return None
+        env = os.environ.copy()
+        env['OMP_THREAD_LIMIT'] = str(limit)
+        return env
 
     def _run_subprocess_hidden(self, cmd, **kwargs):
 
@@ -45,18 +307,32 @@ class OCRProcessor:
             if 'errors' not in run_kwargs:
                 run_kwargs['errors'] = 'ignore'
 
-            if sys.platform == "win32":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                
-                run_kwargs['startupinfo'] = startupinfo
-                run_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+            run_kwargs.update(self._hidden_process_kwargs())
 
-            if sys.platform in ["linux", "darwin"]:
-                run_kwargs['start_new_session'] = True
+            # Ограничение потоков OpenMP дочернего tesseract
+            limit = self.resource_config['omp_thread_limit']
+            if run_kwargs.get('env') is None:
+                run_kwargs['env'] = self._tesseract_env()
+            elif limit:
+                run_kwargs['env'] = dict(run_kwargs['env'], OMP_THREAD_LIMIT=str(limit))
             
             return subprocess.run(cmd, **run_kwargs)
+
+    def _hidden_process_kwargs(self) -> Dict[str, Any]:
+        process_kwargs = {}
+
+        if sys.platform == "win32":
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.wShowWindow = subprocess.SW_HIDE
+
+            process_kwargs['startupinfo'] = startupinfo
+            process_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+
+        if sys.platform in ["linux", "darwin"]:
+            process_kwargs['start_new_session'] = True
+
+        return process_kwargs
     
     def _find_tesseract(self, custom_path: Optional[str] = None) -> str:
 
@@ -169,260 +445,925 @@ class OCRProcessor:
         logger.warning("Директория tessdata не найдена или пуста.")
         return None
     
-    def _prepare_command(self, image_path: str, lang: str = 'eng', output_path: Optional[str] = None) -> tuple:
-        if output_path is None:
-            with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as temp_output:
-                output_path = temp_output.name
-        
-        cmd = [
-            self.tesseract_path,
-            image_path,
-            output_path[:-4] if output_path.endswith('.txt') else output_path  # Без .txt
-        ]
-        
-        if lang:
-            cmd.extend(['-l', lang])
-        
-        cmd.extend([
-            '--oem', '3',
-            '--psm', '3',
-            '-c', 'tessedit_create_txt=1'
-        ])
-        
-        if self.tessdata_path:
-            tessdata_dir = str(self.tessdata_path)
-            cmd.extend(['--tessdata-dir', f'"{tessdata_dir}"'])
-        
-        return cmd, output_path
-    
-    def _run_tesseract_safe(self, image_path: str, lang: str = 'eng') -> Dict[str, Any]:
-        
+    def extract_text(self, image_path: str, lang: str = '', timeout: Optional[float] = None) -> Dict[str, Any]:
+        # timeout - общий срок на всю обработку, по его истечении процесс tesseract завершается
+        deadline = self._deadline_from_timeout(timeout)
+
+        if not Path(image_path).exists():
+            return self._build_result(
+                {'success': False, 'error': f'Файл не найден: {image_path}'}, lang, image_path)
+
         try:
-            cmd, output_path = self._prepare_command(image_path, lang)
-            
-            shell_needed = self.os_type == 'windows'
-            
-            result = self._run_subprocess_hidden(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                timeout=30,
-                shell=shell_needed,
-                universal_newlines=True
-            )
-            
-            text = ""
-            if os.path.exists(output_path):
-                with open(output_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    text = f.read()
-                
-                try:
-                    os.unlink(output_path)
-                except:
-                    pass
-            
-            success = result.returncode == 0 and bool(text.strip())
-            
-            if result.stderr:
-                error_lines = [line for line in result.stderr.split('\n') 
-                             if 'Error' in line or 'Failed' in line or 'Warning' in line]
-                if error_lines:
-                    logger.warning(f"Tesseract предупреждения: {' '.join(error_lines[:3])}")
-            
-            return {
-                'text': text.strip(),
-                'success': success,
-                'error': None if success else (result.stderr[:200] if result.stderr else 'Неизвестная ошибка'),
-                'raw_stderr': result.stderr
+            image = self._load_image(image_path)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении изображения {image_path}: {e}")
+            return self._build_result({'success': False, 'error': str(e)}, lang, image_path)
+
+        return self._extract(image, lang, image_path, deadline=deadline)
+
+    def extract_text_from_bytes(self, image_bytes: bytes, lang: str = '',
+                                timeout: Optional[float] = None) -> Dict[str, Any]:
+        deadline = self._deadline_from_timeout(timeout)
+
+        try:
+            image = self._load_image(image_bytes)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке байтов изображения: {e}")
+            return self._build_result({'success': False, 'error': str(e)}, lang, None)
+
+        return self._extract(image, lang, None, deadline=deadline)
+
+    def extract_text_from_array(self, image: np.ndarray, lang: str = '',
+                                timeout: Optional[float] = None) -> Dict[str, Any]:
+        # Массив в формате numpy/PIL: (H, W), (H, W, 3) RGB или (H, W, 4) RGBA
+        if not isinstance(image, np.ndarray) or image.ndim not in (2, 3):
+            return self._build_result(
+                {'success': False, 'error': 'Ожидается массив (H, W), (H, W, 3) или (H, W, 4)'}, lang, None)
+
+        return self._extract(image, lang, None, rgb=True, deadline=self._deadline_from_timeout(timeout))
+
+    def extract_text_incremental(self, image: Union[str, bytes], session_id: Any,
+                                 lang: str = '') -> Dict[str, Any]:
+        image_path = image if isinstance(image, str) else None
+
+        if image_path and not Path(image_path).exists():
+            return self._build_result(
+                {'success': False, 'error': f'Файл не найден: {image_path}'}, lang, image_path)
+
+        try:
+            processed, scale = self._preprocess_image(self._load_image(image))
+        except Exception as e:
+            logger.error(f"Ошибка при чтении изображения: {e}")
+            return self._build_result({'success': False, 'error': str(e)}, lang, image_path)
+
+        with self._incremental_lock:
+            state = self._incremental_sessions.pop(session_id, None)
+
+        tiles = self._band_grid(processed.shape)
+        previous_results = {}
+
+        if state is not None and state['frame'].shape == processed.shape and state['lang'] == lang:
+            route = state['route']
+            dirty = self._changed_bands(state['frame'], processed, tiles)
+            previous_results = state['results']
+        else:
+            # Первый кадр сессии или сменилось разрешение - распознаем все полосы
+            route = self._route_language(processed, lang)
+            dirty = set(tiles)
+
+        tile_results = {}
+        ocr_tiles = [tile for tile in tiles if tile in dirty or tile not in previous_results]
+        ocr_results = self._ocr_tiles(processed, [bounds for bounds, _ in ocr_tiles], route)
+        for tile, result in zip(ocr_tiles, ocr_results):
+            tile_results[tile] = result
+        for tile in tiles:
+            if tile not in tile_results:
+                tile_results[tile] = previous_results[tile]
+
+        with self._incremental_lock:
+            self._incremental_sessions[session_id] = {
+                'frame': processed, 'results': tile_results, 'route': route, 'lang': lang
             }
-            
-        except subprocess.TimeoutExpired:
-            logger.error("Остановка при выполнении Tesseract")
-            return {'text': '', 'success': False, 'error': 'Таймаут'}
+            while len(self._incremental_sessions) > self.incremental_config['max_sessions']:
+                self._incremental_sessions.popitem(last=False)
+
+        logger.info(f"Инкрементальное распознавание: {len(ocr_tiles)} из {len(tiles)} полос")
+
+        # Полосы упорядочены сверху вниз, дубликаты строк из зон перекрытия отбрасываются
+        merged = self._merge_owned_results([tile_results[tile] for tile in tiles], tiles)
+        merged['language'] = route
+        if scale != 1.0:
+            merged['boxes'] = self._scale_boxes(merged['boxes'], 1.0 / scale)
+
+        result = self._build_result(merged, lang, image_path)
+        result['tiles_total'] = len(tiles)
+        result['tiles_ocr'] = len(ocr_tiles)
+        return result
+
+    def reset_incremental_session(self, session_id: Any = None) -> None:
+        with self._incremental_lock:
+            if session_id is None:
+                self._incremental_sessions.clear()
+            else:
+                self._incremental_sessions.pop(session_id, None)
+
+    def _band_grid(self, shape: Tuple[int, ...]) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+        # Полосы во всю ширину: (left, top, width, height) с перекрытием и ядро (x0, y0, x1, y1) без него
+        height, width = shape[:2]
+        band_height = self.incremental_config['band_height']
+        overlap = self.incremental_config['overlap']
+
+        bands = []
+        for y0 in range(0, height, band_height):
+            y1 = min(height, y0 + band_height)
+            top, bottom = max(0, y0 - overlap), min(height, y1 + overlap)
+            bands.append(((0, top, width, bottom - top), (0, y0, width, y1)))
+        return bands
+
+    def _changed_bands(self, previous: np.ndarray, current: np.ndarray,
+                       bands: List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]) -> set:
+        # Изменения ищутся во всей полосе вместе с перекрытием: строка, центр которой в ядре,
+        # может частично выходить в соседнюю полосу
+        config = self.incremental_config
+        changed = cv2.absdiff(previous, current) > config['pixel_delta']
+        if changed.ndim == 3:
+            changed = changed.any(axis=2)
+
+        # Накопленное число изменившихся пикселей по строкам кадра
+        cumulative = np.concatenate(([0], np.cumsum(np.count_nonzero(changed, axis=1))))
+
+        dirty = set()
+        for band in bands:
+            _, top, width, height = band[0]
+            if (cumulative[top + height] - cumulative[top]) / (width * height) > config['min_changed_fraction']:
+                dirty.add(band)
+        return dirty
+
+    def _ocr_tiles(self, image: np.ndarray, tiles: List[Tuple[int, int, int, int]],
+                   lang: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        crops = [image[top:top + height, left:left + width] for left, top, width, height in tiles]
+        workers = min(len(crops), self._parallel_workers())
+
+        if workers <= 1:
+            return [self._run_tesseract(crop, lang, deadline=deadline) for crop in crops]
+
+        # Каждая часть распознается отдельным процессом tesseract или движком пула
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr-tile') as executor:
+            return list(executor.map(lambda crop: self._run_tesseract(crop, lang, deadline=deadline), crops))
+
+    def _parallel_workers(self) -> int:
+        return (self.parallel_config['max_workers'] or self.resource_config['max_workers']
+                or os.cpu_count() or 1)
+
+    def _parallel_tiles(self, shape: Tuple[int, ...]) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+        # Части кадра: (left, top, width, height) с перекрытием и ядро (x0, y0, x1, y1) без него.
+        # Порядок чтения: панели слева направо, внутри панели полосы сверху вниз
+        config = self.parallel_config
+        height, width = shape[:2]
+
+        panes = max(1, round(width / (height * config['monitor_aspect'])))
+        strips = -(-self._parallel_workers() // panes)
+        strips = max(1, min(strips, height // config['min_strip_height']))
+
+        column_edges = [round(i * width / panes) for i in range(panes + 1)]
+        row_edges = [round(i * height / strips) for i in range(strips + 1)]
+        overlap = config['overlap']
+
+        tiles = []
+        for column in range(panes):
+            for row in range(strips):
+                x0, x1 = column_edges[column], column_edges[column + 1]
+                y0, y1 = row_edges[row], row_edges[row + 1]
+                left, top = max(0, x0 - overlap), max(0, y0 - overlap)
+                right, bottom = min(width, x1 + overlap), min(height, y1 + overlap)
+                tiles.append(((left, top, right - left, bottom - top), (x0, y0, x1, y1)))
+
+        return tiles
+
+    def _use_parallel(self, image: np.ndarray) -> bool:
+        return image.shape[0] * image.shape[1] >= self.parallel_config['min_pixels'] and self._parallel_workers() >= 2
+
+    def _run_tesseract_parallel(self, image: np.ndarray, lang: str,
+                                deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        # None - изображение слишком мало или делить не на что, распознается целиком
+        if not self._use_parallel(image):
+            return None
+
+        tiles = self._parallel_tiles(image.shape)
+        if len(tiles) < 2:
+            return None
+
+        logger.info(f"Параллельное распознавание: {len(tiles)} частей")
+        results = self._ocr_tiles(image, [bounds for bounds, _ in tiles], lang, deadline)
+        return self._merge_owned_results(results, tiles)
+
+    def _merge_owned_results(self, results: List[Dict[str, Any]],
+                             tiles: List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]) -> Dict[str, Any]:
+        # Дубликаты из зон перекрытия отбрасываются: строка остается только в той части,
+        # в ядро которой по вертикали попадает центр строки, слово - по горизонтали центр слова
+        min_confidence = self.recognition_config['min_word_confidence']
+        boxes = {key: [] for key in BOX_KEYS}
+        words = []
+        block_offset = 0
+        errors = []
+
+        for result, ((left, top, _, _), (x0, y0, x1, y1)) in zip(results, tiles):
+            if not result.get('success'):
+                errors.append(result.get('error'))
+                continue
+
+            part = result['boxes']
+            line_keys = list(zip(part['block_num'], part['par_num'], part['line_num']))
+
+            line_bounds = {}
+            for i, key in enumerate(line_keys):
+                word_top, word_bottom = part['top'][i], part['top'][i] + part['height'][i]
+                line_top, line_bottom = line_bounds.get(key, (word_top, word_bottom))
+                line_bounds[key] = (min(line_top, word_top), max(line_bottom, word_bottom))
+
+            for i, key in enumerate(line_keys):
+                line_top, line_bottom = line_bounds[key]
+                center_y = top + (line_top + line_bottom) / 2
+                center_x = left + part['left'][i] + part['width'][i] / 2
+                if not (y0 <= center_y < y1 and x0 <= center_x < x1):
+                    continue
+
+                for box_key in BOX_KEYS:
+                    boxes[box_key].append(part[box_key][i])
+                boxes['left'][-1] += left
+                boxes['top'][-1] += top
+                boxes['block_num'][-1] += block_offset
+
+                block, paragraph, line = boxes['block_num'][-1], key[1], key[2]
+                words.append(((block, paragraph), (block, paragraph, line), part['text'][i],
+                              part['conf'][i] >= min_confidence))
+
+            block_offset += max(part['block_num'], default=0)
+
+        raw_text = self._join_words([(paragraph, line, word) for paragraph, line, word, _ in words])
+        text = self._join_words([(paragraph, line, word) for paragraph, line, word, keep in words if keep])
+        success = bool(raw_text)
+
+        return {
+            'text': text,
+            'raw_text': raw_text,
+            'confidence': self._mean_confidence(boxes),
+            'boxes': boxes,
+            'success': success,
+            'error': None if success else (next((e for e in errors if e), None) or 'Пустой результат')
+        }
+
+    async def extract_text_async(self, image: Union[str, bytes], lang: str = '') -> Dict[str, Any]:
+        # Тот же конвейер, что у _extract: предобработка и разбор результата выполняются
+        # в пуле потоков, ожидаются только запуски tesseract
+        image_path = image if isinstance(image, str) else None
+
+        if image_path and not Path(image_path).exists():
+            return self._build_result(
+                {'success': False, 'error': f'Файл не найден: {image_path}'}, lang, image_path)
+
+        unavailable = self._check_tesseract()
+        if unavailable is not None:
+            return self._build_result(unavailable, lang, image_path)
+
+        loop = asyncio.get_running_loop()
+
+        async with self._get_async_semaphore():
+            try:
+                processed, scale, placements = await loop.run_in_executor(
+                    None, lambda: self._prepare_image(self._load_image(image)))
+            except Exception as e:
+                logger.error(f"Ошибка при чтении изображения: {e}")
+                return self._build_result({'success': False, 'error': str(e)}, lang, image_path)
+
+            route, needs_probe = self._plan_language_route(lang)
+            if needs_probe:
+                probe = await self._run_tesseract_async(self._language_probe_region(processed), route)
+                route = self._route_from_probe_text(probe.get('text', ''), route)
+
+            result = None
+            if self._use_parallel(processed):
+                # Крупный кадр делится на части, как в синхронном режиме
+                deadline = self._deadline_from_timeout(self.async_config['timeout'])
+                result = await loop.run_in_executor(
+                    None, self._run_tesseract_parallel, processed, route, deadline)
+            if result is None:
+                result = await self._run_tesseract_async(processed, route)
+
+            result = self._finish_recognition(result, route, scale, placements)
+
+        return self._build_result(result, lang, image_path)
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._async_semaphore is None or self._async_semaphore_loop is not loop:
+            self._async_semaphore = asyncio.Semaphore(self.async_config['max_concurrency'])
+            self._async_semaphore_loop = loop
+        return self._async_semaphore
+
+    async def _run_tesseract_async(self, image: np.ndarray, lang: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+
+        if self.engine_pool:
+            return await loop.run_in_executor(None, self._run_tesseract, image, lang)
+
+        try:
+            psm, oem = self._select_recognition_mode(image)
+            cmd = self._build_tesseract_command(lang, psm, oem)
+            input_data = self._encode_for_tesseract(image)
+
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self._tesseract_env(),
+                **self._hidden_process_kwargs()
+            )
         except Exception as e:
             logger.error(f"Ошибка запуска Tesseract: {e}")
             return {'text': '', 'success': False, 'error': str(e)}
-    
-    def extract_text(self, image_path: str, lang: str = '') -> Dict[str, Any]:
+
         try:
-            if not Path(image_path).exists():
-                return {
-                    'success': False,
-                    'error': f'Файл не найден: {image_path}',
-                    'text': '',
-                    'image_path': image_path
-                }
-            
-            if not self.tesseract_path or not Path(self.tesseract_path).exists():
-                return {
-                    'success': False,
-                    'error': 'Tesseract не найден',
-                    'text': '',
-                    'image_path': image_path
-                }
-            
-            if not self.tessdata_path:
-                logger.warning("Локальный tessdata не найден, пробуем системный Tesseract")
-                result = self._run_tesseract_without_tessdata_dir(image_path, lang)
-            else:
-                result = self._run_tesseract_with_explicit_path(image_path, lang)
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(input_data), timeout=self.async_config['timeout'])
+        except asyncio.TimeoutError:
+            logger.error("Таймаут при выполнении Tesseract")
+            return {'text': '', 'success': False, 'error': 'Таймаут'}
+        finally:
+            # При отмене или таймауте дочерний процесс не должен продолжать работу
+            if process.returncode is None:
+                process.kill()
+                await asyncio.shield(process.wait())
 
-            if result['success']:
-                text = result['text']
-                words = [w for w in text.split() if w.strip()]
+        return self._parse_tesseract_output(process.returncode, stdout, stderr)
 
-                confidence = self._estimate_confidence(text)
-                
-                return {
-                    'text': text,
-                    'raw_text': text,
-                    'confidence': confidence,
-                    'orientation': 0,
-                    'script': self._detect_script(text),
-                    'words_count': len(words),
-                    'language': result.get('language', lang or 'eng'),
-                    'bounding_boxes': {},
-                    'success': True,
-                    'image_path': image_path
-                }
+    def extract_text_batch(self, images: Iterable[Union[str, bytes]], lang: str = '',
+                           max_workers: Optional[int] = None,
+                           max_in_flight: Optional[int] = None) -> List[Dict[str, Any]]:
+        images = list(images)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+
+        for index, result in self.iter_text_batch(images, lang, max_workers, max_in_flight):
+            results[index] = result
+
+        return results
+
+    def iter_text_batch(self, images: Iterable[Union[str, bytes]], lang: str = '',
+                        max_workers: Optional[int] = None,
+                        max_in_flight: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        # Результаты выдаются по мере готовности в виде (индекс во входных данных, результат)
+        max_workers = max_workers or self.resource_config['max_workers'] or os.cpu_count() or 1
+        max_in_flight = max(max_in_flight or max_workers * 2, max_workers)
+        executor = self._get_batch_executor(max_workers)
+
+        started = time.perf_counter()
+        pending = {}
+        total = succeeded = 0
+        items = iter(enumerate(images))
+        exhausted = False
+
+        try:
+            while pending or not exhausted:
+                # Ограничиваем число задач в очереди, чтобы не держать все изображения в памяти
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        index, item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(_extract_in_batch_worker, item, lang)] = (index, item)
+                    total += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Ошибка пакетной обработки изображения #{index}: {e}")
+                        result = self._build_result({'success': False, 'error': str(e)}, lang,
+                                                    item if isinstance(item, str) else None)
+                    succeeded += int(result['success'])
+                    yield index, result
+        finally:
+            for future in pending:
+                future.cancel()
+
+            elapsed = time.perf_counter() - started
+            self.last_batch_stats = {
+                'images': total,
+                'succeeded': succeeded,
+                'failed': total - succeeded,
+                'max_workers': max_workers,
+                'elapsed_seconds': elapsed,
+                'images_per_second': total / elapsed if elapsed > 0 else 0.0
+            }
+            logger.info(f"Пакет: {total} изображений за {elapsed:.2f} с "
+                        f"({self.last_batch_stats['images_per_second']:.2f} изобр./с, процессов: {max_workers})")
+
+    def _get_batch_executor(self, max_workers: int) -> ProcessPoolExecutor:
+        # Рабочие процессы получают настройки при запуске: если они изменились, пул пересоздается
+        settings = self._worker_settings()
+        if (self._batch_executor is None or self._batch_executor_workers != max_workers
+                or self._batch_executor_settings != settings):
+            self._shutdown_batch_executor()
+            self._batch_executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_batch_worker,
+                initargs=(settings,)
+            )
+            self._batch_executor_workers = max_workers
+            self._batch_executor_settings = settings
+        return self._batch_executor
+
+    def _shutdown_batch_executor(self) -> None:
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=True, cancel_futures=True)
+            self._batch_executor = None
+            self._batch_executor_workers = 0
+            self._batch_executor_settings = None
+
+    def _worker_settings(self) -> Dict[str, Any]:
+        # Настройки, с которыми создается OCRProcessor в каждом рабочем процессе
+        return {
+            'tesseract_path': self.tesseract_path,
+            'backend': self.backend,
+            'preprocessing_config': dict(self.preprocessing_config),
+            'recognition_config': dict(self.recognition_config),
+            'layout_config': dict(self.layout_config),
+            'parallel_config': dict(self.parallel_config),
+            'resource_config': dict(self.resource_config),
+            'language_routing_config': dict(self.language_routing_config),
+            'text_region_config': dict(self.text_region_config),
+            'incremental_config': dict(self.incremental_config),
+            'async_config': dict(self.async_config)
+        }
+
+    def _extract(self, image: np.ndarray, lang: str, image_path: Optional[str],
+                 rgb: bool = False, deadline: Optional[float] = None) -> Dict[str, Any]:
+        source_name = Path(image_path).name if image_path else 'изображение из памяти'
+
+        try:
+            unavailable = self._check_tesseract()
+            if unavailable is not None:
+                return self._build_result(unavailable, lang, image_path)
+
+            processed, scale, placements = self._prepare_image(image, rgb=rgb)
+            result = self._recognize(processed, lang, deadline)
+            result = self._finish_recognition(result, result['language'], scale, placements)
+
+            if result['success']:
+                logger.info(f"Успешно извлечен текст из {source_name}: "
+                           f"{len(result['text'])} символов, язык: {result.get('language')}")
             else:
-                return {
-                    'text': '',
-                    'raw_text': '',
-                    'confidence': 0,
-                    'orientation': 0,
-                    'script': 'Unknown',
-                    'words_count': 0,
-                    'language': lang or 'eng',
-                    'bounding_boxes': {},
-                    'success': False,
-                    'error': result['error'],
-                    'image_path': image_path
-                }
-                
+                logger.error(f"Ошибка при извлечении текста из {source_name}: {result.get('error')}")
+
+            return self._build_result(result, lang, image_path)
+
         except Exception as e:
-            logger.error(f"Ошибка при извлечении текста из {image_path}: {e}")
+            logger.error(f"Критическая ошибка при извлечении текста из {source_name}: {e}")
+            import traceback
+            traceback.print_exc()
+
+            return self._build_result(
+                {'success': False, 'error': f"Критическая ошибка: {str(e)}"}, lang, image_path)
+
+    def _build_result(self, result: Dict[str, Any], lang: str, image_path: Optional[str]) -> Dict[str, Any]:
+        if result.get('success'):
+            text = result['text']
+            words = [w for w in text.split() if w.strip()]
+
             return {
-                'text': '',
-                'raw_text': '',
-                'confidence': 0,
+                'text': text,
+                'raw_text': result.get('raw_text', text),
+                'confidence': result['confidence'],
                 'orientation': 0,
-                'script': 'Unknown',
-                'words_count': 0,
-                'language': lang or 'eng',
-                'bounding_boxes': {},
-                'success': False,
-                'error': str(e),
+                'script': self._detect_script(text),
+                'words_count': len(words),
+                'language': result.get('language', lang or 'eng'),
+                'bounding_boxes': result.get('boxes', {}),
+                'success': True,
+                'error': None,
                 'image_path': image_path
             }
-    
-    def _run_tesseract_with_explicit_path(self, image_path: str, lang: str) -> Dict[str, Any]:
-        
-        processed_path = self._preprocess_and_save(image_path)
-        
-        if not processed_path:
-            return {'text': '', 'success': False, 'error': 'Ошибка предобработки'}
 
-        test_cases = []
-        
+        return {
+            'text': '',
+            'raw_text': '',
+            'confidence': 0,
+            'orientation': 0,
+            'script': 'Unknown',
+            'words_count': 0,
+            'language': result.get('language', lang or 'eng'),
+            'bounding_boxes': {},
+            'success': False,
+            'error': result.get('error') or 'Неизвестная ошибка',
+            'image_path': image_path
+        }
+
+    def _load_image(self, source: Union[str, bytes]) -> np.ndarray:
+        # Декодирование OpenCV: массив в порядке каналов BGR/BGRA или оттенки серого.
+        # Путь читается через numpy, т.к. cv2.imread не поддерживает не-ASCII пути в Windows
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = np.frombuffer(source, dtype=np.uint8)
+        else:
+            data = np.fromfile(source, dtype=np.uint8)
+
+        image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            # Форматы, которые OpenCV не читает (например, GIF), декодируем через PIL
+            with Image.open(io.BytesIO(data.tobytes())) as pil_image:
+                mode = 'RGBA' if pil_image.mode in ('RGBA', 'LA', 'P') else 'RGB'
+                image = np.asarray(pil_image.convert(mode))
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA if mode == 'RGBA' else cv2.COLOR_RGB2BGR)
+
+        return image
+
+    def _check_tesseract(self) -> Optional[Dict[str, Any]]:
+        # Ошибка, если исполняемый файл Tesseract недоступен; None - можно распознавать
+        if not self.tesseract_path or not Path(self.tesseract_path).exists():
+            return {'success': False, 'error': 'Tesseract не найден'}
+
+        if not self.tessdata_path:
+            logger.warning("Локальный tessdata не найден, пробуем системный Tesseract")
+        return None
+
+    def _prepare_image(self, image: np.ndarray, rgb: bool = False) -> Tuple[np.ndarray, float, Optional[List[Tuple[int, int, int, int, int]]]]:
+        # Общая часть синхронного и асинхронного режимов: предобработка и, если включено,
+        # мозаика из областей с текстом
+        processed, scale = self._preprocess_image(image, rgb=rgb)
+        placements = None
+        if self.text_region_config['enabled']:
+            processed, placements = self._crop_to_text_regions(processed)
+        return processed, scale, placements
+
+    def _recognize(self, image: np.ndarray, lang: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        # Язык выбирается заранее, распознавание выполняется один раз
+        route = self._route_language(image, lang, deadline)
+        logger.info(f"Распознавание с языком: {route}")
+
+        result = self._run_tesseract_parallel(image, route, deadline)
+        if result is None:
+            result = self._run_tesseract(image, route, deadline=deadline)
+        result['language'] = route
+        return result
+
+    def _finish_recognition(self, result: Dict[str, Any], route: str, scale: float,
+                            placements: Optional[List[Tuple[int, int, int, int, int]]]) -> Dict[str, Any]:
+        result['language'] = route
+        if placements and result['success']:
+            result['boxes'] = self._map_mosaic_boxes(result['boxes'], placements)
+        if scale != 1.0 and result['success']:
+            # Координаты слов возвращаем в систему исходного изображения
+            result['boxes'] = self._scale_boxes(result['boxes'], 1.0 / scale)
+
+        if result['success']:
+            logger.info(f"Успешно распознано с языком {route}: {len(result['text'])} символов")
+        else:
+            logger.warning(f"Не удалось распознать с языком {route}: {result.get('error')}")
+
+        return result
+
+    def _detect_text_regions(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        config = self.text_region_config
+        height, width = image.shape[:2]
+
+        # Границы символов дают сильный градиент, фон, фото и видео - слабый или неструктурированный
+        gradient = cv2.morphologyEx(image, cv2.MORPH_GRADIENT,
+                                    cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # Объединяем символы в строки горизонтальным замыканием
+        connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE,
+                                     cv2.getStructuringElement(cv2.MORPH_RECT, config['connect_kernel']))
+        contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        padding = config['padding']
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < config['min_area'] or not config['min_height'] <= h <= config['max_height']:
+                continue
+            if cv2.countNonZero(binary[y:y + h, x:x + w]) < config['min_fill'] * w * h:
+                continue
+
+            left, top = max(0, x - padding), max(0, y - padding)
+            right, bottom = min(width, x + w + padding), min(height, y + h + padding)
+            boxes.append([left, top, right, bottom])
+
+        # Сливаем пересекающиеся области
+        merged = True
+        while merged:
+            merged = False
+            boxes.sort(key=lambda b: (b[1], b[0]))
+            result = []
+            for box in boxes:
+                for other in result:
+                    if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                        other[0], other[1] = min(other[0], box[0]), min(other[1], box[1])
+                        other[2], other[3] = max(other[2], box[2]), max(other[3], box[3])
+                        merged = True
+                        break
+                else:
+                    result.append(box)
+            boxes = result
+
+        return [(left, top, right - left, bottom - top) for left, top, right, bottom in boxes]
+
+    def _crop_to_text_regions(self, image: np.ndarray) -> Tuple[np.ndarray, Optional[List[Tuple[int, int, int, int, int]]]]:
+        # Возвращает мозаику из найденных областей и их размещение:
+        # (x в исходном кадре, y в исходном кадре, ширина, высота, y в мозаике)
+        regions = self._detect_text_regions(image)
+        if not regions:
+            return image, None
+
+        height, width = image.shape[:2]
+        region_area = sum(w * h for _, _, w, h in regions)
+        if region_area > self.text_region_config['max_coverage'] * width * height:
+            return image, None
+
+        gap = self.text_region_config['gap']
+        mosaic_width = max(w for _, _, w, _ in regions) + 2 * gap
+        mosaic_height = sum(h for _, _, _, h in regions) + gap * (len(regions) + 1)
+        mosaic = np.full((mosaic_height, mosaic_width), 255, dtype=image.dtype)
+
+        # Области укладываются в одну колонку в порядке чтения, чтобы обойтись одним вызовом Tesseract
+        placements = []
+        offset = gap
+        for x, y, w, h in regions:
+            mosaic[offset:offset + h, gap:gap + w] = image[y:y + h, x:x + w]
+            placements.append((x, y, w, h, offset))
+            offset += h + gap
+
+        return mosaic, placements
+
+    def _map_mosaic_boxes(self, boxes: Dict[str, List], placements: List[Tuple[int, int, int, int, int]]) -> Dict[str, List]:
+        # Переводим координаты слов из мозаики обратно в координаты исходного кадра
+        gap = self.text_region_config['gap']
+        mapped = {key: list(values) for key, values in boxes.items()}
+
+        for i, (top, height) in enumerate(zip(boxes['top'], boxes['height'])):
+            center = top + height / 2
+            for x, y, _, h, offset in placements:
+                if offset - gap / 2 <= center < offset + h + gap / 2:
+                    mapped['left'][i] = boxes['left'][i] - gap + x
+                    mapped['top'][i] = top - offset + y
+                    break
+
+        return mapped
+
+    def _list_tessdata_languages(self) -> List[str]:
+        if not self.tessdata_path:
+            return []
+        return sorted(
+            path.stem for path in Path(self.tessdata_path).glob('*.traineddata')
+            if path.stem not in ('osd', 'equ')
+        )
+
+    def _route_language(self, image: np.ndarray, lang: str, deadline: Optional[float] = None) -> str:
+        route, needs_probe = self._plan_language_route(lang)
+        if not needs_probe:
+            return route
+
+        # Пробное распознавание центральной области по всем языкам сразу
+        probe_text = self._run_language_probe(image, route, deadline)
+        return self._route_from_probe_text(probe_text, route)
+
+    def _plan_language_route(self, lang: str) -> Tuple[str, bool]:
         if lang:
-            test_cases.append((lang, lang))
-
-        if lang != 'eng+rus':
-            test_cases.append(('eng+rus', 'eng+rus'))
-        if lang != 'eng':
-            test_cases.append(('eng', 'eng'))
-        if lang != 'rus':
-            test_cases.append(('rus', 'rus'))
-        if lang != '':
-            test_cases.append(('', 'auto'))
-        
-        best_result = {'text': '', 'success': False, 'error': ''}
-        
-        for lang_flag, lang_name in test_cases:
-            logger.info(f"Пробуем распознавание с языком: {lang_name}")
-            result = self._run_tesseract_subprocess(processed_path, lang_flag)
-            
-            if result['success'] and result['text'].strip():
-                best_result = result
-                best_result['language'] = lang_name
-                logger.info(f"Успешно распознано с языком {lang_name}: {len(result['text'])} символов")
-                break
-            else:
-                logger.warning(f"Не удалось распознать с языком {lang_name}: {result.get('error')}")
-        
+            return lang, False
+
+        config = self.language_routing_config
+        candidates = [l for l in config['candidates'] if l in self.available_languages] or ['eng']
+        combined = '+'.join(candidates)
+
+        return combined, len(candidates) > 1 and config['mode'] == 'probe'
+
+    def _route_from_probe_text(self, probe_text: str, combined: str) -> str:
+        config = self.language_routing_config
+        candidates = combined.split('+')
+
+        cyrillic_count = sum(1 for c in probe_text if '\u0400' <= c <= '\u04FF')
+        latin_count = sum(1 for c in probe_text if c.isalpha() and c.isascii())
+        total = cyrillic_count + latin_count
+
+        if total < config['probe_min_chars']:
+            return combined
+
+        if cyrillic_count / total >= config['dominance']:
+            script = 'Cyrillic'
+        elif latin_count / total >= config['dominance']:
+            script = 'Latin'
+        else:
+            return combined
+
+        routed = config['script_languages'].get(script)
+        return routed if routed in candidates else combined
+
+    def _run_language_probe(self, image: np.ndarray, lang: str, deadline: Optional[float] = None) -> str:
         try:
-            if processed_path != image_path and os.path.exists(processed_path):
-                os.unlink(processed_path)
+            return self._run_tesseract(self._language_probe_region(image), lang, deadline=deadline).get('text', '')
         except Exception as e:
-            logger.warning(f"Не удалось удалить временный файл: {e}")
-        
-        return best_result
+            logger.warning(f"Ошибка определения языка: {e}")
+            return ''
+
+    def _language_probe_region(self, image: np.ndarray) -> np.ndarray:
+        height, width = image.shape[:2]
+        probe_width, probe_height = self.language_routing_config['probe_size']
+        left = max(0, (width - probe_width) // 2)
+        top = max(0, (height - probe_height) // 2)
+        return image[top:top + probe_height, left:left + probe_width]
+
+    def _run_tesseract(self, image: np.ndarray, lang: str, mode: Optional[Tuple[int, int]] = None,
+                       deadline: Optional[float] = None) -> Dict[str, Any]:
+        timeout = self._remaining_time(deadline)
+        if timeout <= 0:
+            return {'text': '', 'success': False, 'error': 'Таймаут'}
+
+        psm, oem = mode or self._select_recognition_mode(image)
+
+        if self.engine_pool:
+            try:
+                tsv = self.engine_pool.recognize(image, lang if lang else 'eng', psm=psm, oem=oem,
+                                                 variables=self._tesseract_variables(), timeout=timeout)
+            except TimeoutError:
+                logger.error("Таймаут при выполнении Tesseract")
+                return {'text': '', 'success': False, 'error': 'Таймаут'}
+            except Exception as e:
+                logger.error(f"Ошибка движка Tesseract: {e}")
+                return {'text': '', 'success': False, 'error': str(e)}
+            return self._parse_tsv(tsv)
+        return self._run_tesseract_subprocess(image, lang, psm, oem, timeout)
+
+    def _deadline_from_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return time.monotonic() + timeout if timeout is not None else None
+
+    def _remaining_time(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.recognition_config['timeout']
+        return deadline - time.monotonic()
 
-    def _run_tesseract_subprocess(self, image_path: str, lang: str) -> Dict[str, Any]:
+    def _select_recognition_mode(self, image: np.ndarray) -> Tuple[int, int]:
+        config = self.recognition_config
+        if config['psm'] != 'auto':
+            return int(config['psm']), int(config['oem'])
+
+        layout = self._analyze_layout(image)
+        psm, oem = self.layout_config['modes'][layout]
+        logger.debug(f"Разметка изображения: {layout}, PSM {psm}, OEM {oem}")
+        return psm, oem
+
+    def _analyze_layout(self, image: np.ndarray) -> str:
+        # Дешевая оценка разметки по уменьшенной копии: 'empty', 'line', 'sparse', 'block' или 'columns'
+        config = self.layout_config
+        height, width = image.shape[:2]
+        if height == 0 or width == 0:
+            return 'empty'
+
+        scale = config['analysis_scale']
+        small = image if scale >= 1.0 else cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if small.size == 0:
+            return 'empty'
+
+        gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, np.ones((2, 2), np.uint8))
+        if gradient.max() < config['min_contrast']:
+            return 'empty'
+
+        _, mask = cv2.threshold(gradient, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # Строки текста - непрерывные полосы строк маски с хотя бы двумя пикселями границ
+        text_rows = np.count_nonzero(mask, axis=1) >= 2
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], text_rows.view(np.int8), [0]))))
+        runs = edges[1::2] - edges[::2]
+        lines = int(np.count_nonzero(runs >= config['min_line_height']))
+
+        if lines == 0:
+            return 'empty'
+        if lines == 1:
+            return 'line'
+        if mask.mean() < config['sparse_density']:
+            return 'sparse'
+
+        # Колонки: широкий вертикальный просвет между крайними столбцами с текстом
+        text_columns = np.flatnonzero(mask[text_rows].any(axis=0))
+        widest_gap = int(np.diff(text_columns).max()) if len(text_columns) > 1 else 0
+        if widest_gap >= config['column_gap'] * mask.shape[1]:
+            return 'columns'
+        return 'block'
+
+    def _tesseract_variables(self) -> Dict[str, str]:
+        if self.recognition_config['disable_dictionaries']:
+            return {'load_system_dawg': '0', 'load_freq_dawg': '0'}
+        return {}
+
+    def _parse_tsv(self, tsv: str) -> Dict[str, Any]:
+        # Текст собирается из TSV того же запуска: строки через перевод строки,
+        # абзацы через пустую строку, как в текстовом выводе Tesseract
+        min_confidence = self.recognition_config['min_word_confidence']
+        boxes = {key: [] for key in BOX_KEYS}
+        words = []
+
+        for row in tsv.splitlines():
+            fields = row.split('\t')
+            if len(fields) < 12 or fields[0] != '5':
+                continue
+
+            word = fields[11].strip()
+            if not word:
+                continue
+
+            confidence = float(fields[10])
+            boxes['text'].append(word)
+            boxes['left'].append(int(fields[6]))
+            boxes['top'].append(int(fields[7]))
+            boxes['width'].append(int(fields[8]))
+            boxes['height'].append(int(fields[9]))
+            boxes['conf'].append(confidence)
+            boxes['block_num'].append(int(fields[2]))
+            boxes['par_num'].append(int(fields[3]))
+            boxes['line_num'].append(int(fields[4]))
+            words.append(((fields[1], fields[2], fields[3]), (fields[1], fields[2], fields[3], fields[4]),
+                          word, confidence >= min_confidence))
+
+        raw_text = self._join_words([(paragraph, line, word) for paragraph, line, word, _ in words])
+        text = self._join_words([(paragraph, line, word) for paragraph, line, word, keep in words if keep])
+        success = bool(raw_text)
+
+        return {
+            'text': text,
+            'raw_text': raw_text,
+            'confidence': self._mean_confidence(boxes),
+            'boxes': boxes,
+            'success': success,
+            'error': None if success else 'Пустой результат'
+        }
+
+    def _join_words(self, words: List[Tuple[tuple, tuple, str]]) -> str:
+        lines = []
+        previous = None
+
+        for paragraph, line, word in words:
+            if previous is not None and previous[1] == line:
+                lines[-1] += ' ' + word
+            else:
+                if previous is not None and previous[0] != paragraph:
+                    lines.append('')
+                lines.append(word)
+            previous = (paragraph, line)
+
+        return '\n'.join(lines)
+
+    def _mean_confidence(self, boxes: Dict[str, List]) -> float:
+        confidences = [c for c in boxes['conf'] if c >= 0]
+        return float(sum(confidences) / len(confidences)) if confidences else 0.0
+
+    def _encode_for_tesseract(self, image: np.ndarray) -> bytes:
+        # PGM/PPM без сжатия: кодирование почти бесплатно, Leptonica читает его из stdin
+        extension = '.pgm' if image.ndim == 2 else '.ppm'
+        ok, encoded = cv2.imencode(extension, image)
+        if not ok:
+            raise ValueError("Не удалось закодировать изображение для Tesseract")
+        return encoded.tobytes()
+
+    def _build_tesseract_command(self, lang: str, psm: int = 3, oem: int = 3) -> List[str]:
+        cmd = [
+            self.tesseract_path,
+            'stdin',
+            'stdout',
+            '-l', lang if lang else 'eng',
+            '--oem', str(oem),
+            '--psm', str(psm)
+        ]
+
+        if self.tessdata_path:
+            cmd.extend(['--tessdata-dir', str(self.tessdata_path)])
+
+        for name, value in self._tesseract_variables().items():
+            cmd.extend(['-c', f"{name}={value}"])
+
+        # Вывод TSV: текст, уверенность и координаты каждого слова за один запуск
+        cmd.append('tsv')
+
+        return cmd
+
+    def _parse_tesseract_output(self, returncode: int, stdout: bytes, stderr: bytes) -> Dict[str, Any]:
+        stderr_text = stderr.decode('utf-8', errors='ignore') if stderr else ''
+
+        if stderr_text:
+            error_lines = [line for line in stderr_text.split('\n')
+                         if 'Error' in line or 'Failed' in line]
+            if error_lines:
+                logger.warning(f"Tesseract предупреждения: {' '.join(error_lines[:2])}")
+
+        if returncode != 0:
+            return {'text': '', 'success': False, 'error': stderr_text[:200] if stderr_text else 'Пустой результат'}
+
+        return self._parse_tsv(stdout.decode('utf-8', errors='ignore'))
+
+    def _run_tesseract_subprocess(self, image: np.ndarray, lang: str, psm: int = 3, oem: int = 3,
+                                  timeout: Optional[float] = None) -> Dict[str, Any]:
         try:
-            tessdata_dir = str(self.tessdata_path)
-            tesseract_lang = lang if lang else 'eng'
-            
-            with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as temp_output:
-                output_path = temp_output.name
-            
-            cmd = [
-                self.tesseract_path,
-                image_path,
-                output_path[:-4],
-                '-l', tesseract_lang,
-                '--tessdata-dir', tessdata_dir,
-                '--oem', '3',
-                '--psm', '3'
-            ]
-            
+            cmd = self._build_tesseract_command(lang, psm, oem)
+
             logger.debug(f"Выполняем команду: {' '.join(cmd)}")
-            
+
+            # Изображение передается через stdin, текст читается из stdout
             result = self._run_subprocess_hidden(
                 cmd,
+                input=self._encode_for_tesseract(image),
                 capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                timeout=30,
+                encoding=None,
+                errors=None,
+                timeout=timeout or self.recognition_config['timeout'],
                 shell=False
             )
-            
-            text = ""
-            if os.path.exists(output_path):
-                encodings = ['utf-8', 'cp1251', 'cp866', 'iso-8859-1', 'windows-1252']
-                for encoding in encodings:
-                    try:
-                        with open(output_path, 'r', encoding=encoding, errors='ignore') as f:
-                            text = f.read()
-                            if text.strip():
-                                logger.debug(f"Текст прочитан в кодировке {encoding}")
-                                break
-                    except Exception as e:
-                        logger.debug(f"Ошибка при чтении с кодировкой {encoding}: {e}")
-                        continue
-            try:
-                os.unlink(output_path)
-            except:
-                pass
-            
-            success = result.returncode == 0 and bool(text.strip())
-            
-            if result.stderr:
-                error_lines = [line for line in result.stderr.split('\n') 
-                             if 'Error' in line or 'Failed' in line]
-                if error_lines:
-                    logger.warning(f"Tesseract предупреждения: {' '.join(error_lines[:2])}")
-            
-            return {
-                'text': text.strip(),
-                'success': success,
-                'error': None if success else (result.stderr[:200] if result.stderr else 'Пустой результат')
-            }
-            
+
+            return self._parse_tesseract_output(result.returncode, result.stdout, result.stderr)
+
         except subprocess.TimeoutExpired:
             logger.error("Таймаут при выполнении Tesseract")
             return {'text': '', 'success': False, 'error': 'Таймаут'}
@@ -430,166 +1371,94 @@ class OCRProcessor:
             logger.error(f"Ошибка запуска Tesseract: {e}")
             return {'text': '', 'success': False, 'error': str(e)}
 
-    def extract_text(self, image_path: str, lang: str = '') -> Dict[str, Any]:
-        try:
-            if not Path(image_path).exists():
-                return {
-                    'success': False,
-                    'error': f'Файл не найден: {image_path}',
-                    'text': '',
-                    'image_path': image_path,
-                    'confidence': 0,
-                    'words_count': 0,
-                    'language': lang or 'eng',
-                    'script': 'Unknown'
-                }
-
-            if not self.tesseract_path or not Path(self.tesseract_path).exists():
-                return {
-                    'success': False,
-                    'error': 'Tesseract не найден',
-                    'text': '',
-                    'image_path': image_path,
-                    'confidence': 0,
-                    'words_count': 0,
-                    'language': lang or 'eng',
-                    'script': 'Unknown'
-                }
-
-            if not self.tessdata_path:
-                logger.warning("Локальный tessdata не найден, пробуем системный Tesseract")
-                result = self._run_tesseract_without_tessdata_dir(image_path, lang)
-            else:
-                result = self._run_tesseract_with_explicit_path(image_path, lang)
+    def _preprocess_image(self, image: np.ndarray, rgb: bool = False) -> Tuple[np.ndarray, float]:
+        # Возвращает изображение в оттенках серого (uint8) и примененный коэффициент масштаба.
+        # rgb=True - каналы в порядке RGB(A), иначе BGR(A), как после cv2.imdecode
+        config = self.preprocessing_config
 
-            if result['success']:
-                text = result['text']
-                words = [w for w in text.split() if w.strip()]
-                
-                confidence = self._estimate_confidence(text)
-                script = self._detect_script(text)
-                detected_lang = result.get('language', lang or 'eng')
-                
-                logger.info(f"Успешно извлечен текст из {Path(image_path).name}: "
-                           f"{len(text)} символов, {len(words)} слов, язык: {detected_lang}")
-                
-                return {
-                    'text': text,
-                    'raw_text': text,
-                    'confidence': confidence,
-                    'orientation': 0,
-                    'script': script,
-                    'words_count': len(words),
-                    'language': detected_lang,
-                    'bounding_boxes': {},
-                    'success': True,
-                    'error': None,
-                    'image_path': image_path
-                }
-            else:
-                error_msg = result.get('error', 'Неизвестная ошибка')
-                logger.error(f"Ошибка при извлечении текста из {Path(image_path).name}: {error_msg}")
-                
-                return {
-                    'text': '',
-                    'raw_text': '',
-                    'confidence': 0,
-                    'orientation': 0,
-                    'script': 'Unknown',
-                    'words_count': 0,
-                    'language': lang or 'eng',
-                    'bounding_boxes': {},
-                    'success': False,
-                    'error': error_msg,
-                    'image_path': image_path
-                }
-                
-        except Exception as e:
-            logger.error(f"Критическая ошибка при извлечении текста из {image_path}: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            return {
-                'text': '',
-                'raw_text': '',
-                'confidence': 0,
-                'orientation': 0,
-                'script': 'Unknown',
-                'words_count': 0,
-                'language': lang or 'eng',
-                'bounding_boxes': {},
-                'success': False,
-                'error': f"Критическая ошибка: {str(e)}",
-                'image_path': image_path
-            }
+        gray = self._to_grayscale(image, rgb)
 
-    
-    def _run_tesseract_without_tessdata_dir(self, image_path: str, lang: str) -> Dict[str, Any]:
-        try:
-            image = Image.open(image_path)
+        scale = self._preprocess_scale(gray.shape)
+        if scale != 1.0:
+            interpolation = cv2.INTER_CUBIC if scale > 1.0 else cv2.INTER_AREA
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
 
-            config = '--oem 3 --psm 3'
+        method = config['denoise_method']
+        if method == 'median':
+            gray = cv2.medianBlur(gray, 3)
+        elif method == 'nlmeans':
+            gray = cv2.fastNlMeansDenoising(gray, None, h=config['denoise_strength'])
+        elif method != 'none':
+            raise ValueError(f"Неизвестный метод шумоподавления: {method}")
+
+        contrast = config['contrast_factor']
+        if contrast != 1.0:
+            # Как PIL ImageEnhance.Contrast: растяжение относительно средней яркости
+            mean = float(cv2.mean(gray)[0])
+            gray = cv2.addWeighted(gray, contrast, gray, 0, mean * (1.0 - contrast))
+
+        sharpness = config['sharpness_factor']
+        if sharpness != 1.0:
+            # Как PIL ImageEnhance.Sharpness: смешивание со сглаженной копией
+            blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+            gray = cv2.addWeighted(gray, sharpness, blurred, 1.0 - sharpness, 0)
+
+        binarization = config['binarization']
+        if binarization == 'fixed':
+            _, gray = cv2.threshold(gray, config['binary_threshold'], 255, cv2.THRESH_BINARY)
+        elif binarization == 'otsu':
+            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        elif binarization == 'adaptive':
+            block_size = config['adaptive_block_size'] | 1
+            gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY, block_size, config['adaptive_c'])
+        elif binarization != 'none':
+            raise ValueError(f"Неизвестный метод бинаризации: {binarization}")
+
+        return gray, scale
+
+    def _to_grayscale(self, image: np.ndarray, rgb: bool) -> np.ndarray:
+        if image.dtype == np.uint16:
+            image = (image >> 8).astype(np.uint8)
+        elif image.dtype != np.uint8:
+            raise ValueError(f"Неподдерживаемый тип пикселей: {image.dtype}")
+
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 1:
+            return image[:, :, 0]
+
+        if image.shape[2] == 4:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY if rgb else cv2.COLOR_BGRA2GRAY)
+            # Прозрачные области накладываем на белый фон
+            alpha = image[:, :, 3]
+            if alpha.min() < 255:
+                gray = cv2.add(cv2.multiply(gray, alpha, scale=1 / 255),
+                               cv2.subtract(255, alpha))
+            return gray
+
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+
+    def _preprocess_scale(self, shape: Tuple[int, ...]) -> float:
+        config = self.preprocessing_config
+        factor = float(config['resize_factor'])
+        if factor <= 1.0:
+            return factor
+
+        pixels = shape[0] * shape[1]
+        limit = config['max_upscale_pixels']
+        if pixels >= limit:
+            return 1.0
+        # Не увеличиваем сверх лимита пикселей
+        return min(factor, (limit / pixels) ** 0.5)
+
+    def _scale_boxes(self, boxes: Dict[str, List], factor: float) -> Dict[str, List]:
+        scaled = dict(boxes)
+        for key in ('left', 'top', 'width', 'height'):
+            if key in boxes:
+                scaled[key] = [int(round(value * factor)) for value in boxes[key]]
+        return scaled
 
-            tesseract_lang = lang if lang else 'eng'
-            text = pytesseract.image_to_string(image, lang=tesseract_lang, config=config)
-            
-            return {
-                'text': text.strip(),
-                'success': bool(text.strip()),
-                'error': None
-            }
-        except Exception as e:
-            logger.error(f"Ошибка при использовании pytesseract: {e}")
-            return {'text': '', 'success': False, 'error': str(e)}
-    
-    def _preprocess_and_save(self, image_path: str) -> str:
-        try:
-            image = Image.open(image_path)
-            
-            # Простая предобработка
-            if image.mode == 'RGBA':
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                background.paste(image, mask=image.split()[3])
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Конвертируем в оттенки серого
-            image = image.convert('L')
-            
-            # Улучшаем контраст
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.3)
-            
-            # Сохраняем во временный файл
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                image.save(temp_path, 'PNG', optimize=True)
-            
-            return temp_path
-            
-        except Exception as e:
-            logger.error(f"Ошибка предобработки: {e}")
-            return image_path
-    
-    def _estimate_confidence(self, text: str) -> float:
-        if not text:
-            return 0.0
-        
-        words = [w for w in text.split() if w.strip()]
-        word_count = len(words)
-        
-        if word_count == 0:
-            return 0.0
-        elif word_count == 1:
-            return 30.0
-        elif word_count <= 3:
-            return 50.0
-        elif word_count <= 10:
-            return 70.0
-        else:
-            return min(90.0, 70.0 + word_count)
-    
     def _detect_script(self, text: str) -> str:
         if not text:
             return 'Unknown'
@@ -604,29 +1473,11 @@ class OCRProcessor:
         else:
             return 'Unknown'
     
-    def extract_text_from_bytes(self, image_bytes: bytes, lang: str = '') -> Dict[str, Any]:
-        try:
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                temp_file.write(image_bytes)
-            
-            result = self.extract_text(temp_path, lang)
-            
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Ошибка при обработке байтов изображения: {e}")
-            return {
-                'text': '', 'success': False, 'error': str(e),
-                'confidence': 0, 'words_count': 0
-            }
-    
-    def test_tesseract_installation(self) -> Dict[str, Any]:
+    def test_tesseract_installation(self, use_cache: bool = True) -> Dict[str, Any]:
+        cached = self._discovery_entry.get('installation')
+        if use_cache and cached:
+            return dict(cached)
+        
         logger.info("Тестирование установки Tesseract...")
         
         result = {
@@ -702,4 +1553,42 @@ class OCRProcessor:
             logger.error(f"Ошибка при тестировании Tesseract: {e}")
             result['languages_available'] = []
         
+        if result['tesseract_accessible']:
+            # Список языков от самого Tesseract точнее поиска файлов в tessdata
+            languages = [lang for lang in result['languages_available'] if lang not in ('osd', 'equ')]
+            if languages:
+                self.available_languages = languages
+                self._discovery_entry['languages'] = languages
+            self._discovery_entry['installation'] = result
+            self._save_discovery_entry()
+        
         return result
+
+
+_batch_worker_processor: Optional[OCRProcessor] = None
+
+def _init_batch_worker(settings: Dict[str, Any]) -> None:
+    global _batch_worker_processor
+
+    # OpenMP читает ограничение при первом запуске движка в процессе
+    omp_thread_limit = settings['resource_config']['omp_thread_limit']
+    if omp_thread_limit:
+        os.environ['OMP_THREAD_LIMIT'] = str(omp_thread_limit)
+
+    # В каждом рабочем процессе один движок: параллелизм обеспечивает сам пул процессов
+    processor = OCRProcessor(settings['tesseract_path'], backend=settings['backend'], pool_size=1)
+    processor.preprocessing_config.update(settings['preprocessing_config'])
+    processor.recognition_config.update(settings['recognition_config'])
+    processor.layout_config.update(settings['layout_config'])
+    processor.parallel_config.update(settings['parallel_config'])
+    processor.resource_config.update(settings['resource_config'])
+    processor.language_routing_config.update(settings['language_routing_config'])
+    processor.text_region_config.update(settings['text_region_config'])
+    processor.incremental_config.update(settings['incremental_config'])
+    processor.async_config.update(settings['async_config'])
+    _batch_worker_processor = processor
+
+def _extract_in_batch_worker(item: Union[str, bytes], lang: str) -> Dict[str, Any]:
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return _batch_worker_processor.extract_text_from_bytes(item, lang)
+    return _batch_worker_processor.extract_text(str(item), lang)
@@ -0,0 +1,162 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+
+from ocr_processor import OCRProcessor
+
+logger = logging.getLogger(__name__)
+
+class OCRScheduler:
+
+    def __init__(self, ocr_processor: OCRProcessor, num_workers: Optional[int] = None):
+        self.ocr_processor = ocr_processor
+        self.num_workers = num_workers or ocr_processor.resource_config['max_workers'] or os.cpu_count() or 1
+
+        # Полосы приоритета: полоса с меньшим rank всегда обслуживается первой,
+        # внутри полосы - задача с ближайшим сроком. timeout - срок по умолчанию, с
+        self.lanes = {
+            'interactive': {'rank': 0, 'timeout': 5.0},
+            'bulk': {'rank': 1, 'timeout': 300.0}
+        }
+
+        # Куча (rank, срок, порядковый номер, задача)
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._running = 0
+        self._counters = {lane: self._empty_counters() for lane in self.lanes}
+
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"ocr-scheduler-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        logger.info(f"Планировщик OCR запущен: {self.num_workers} потоков")
+
+    @staticmethod
+    def _empty_counters() -> Dict[str, int]:
+        return {'queued': 0, 'submitted': 0, 'completed': 0, 'dropped': 0, 'timed_out': 0, 'cancelled': 0}
+
+    def submit(self, image: Union[str, bytes, np.ndarray], lang: str = '', lane: str = 'interactive',
+               timeout: Optional[float] = None) -> Future:
+        # Возвращает Future с результатом в формате OCRProcessor.extract_text.
+        # Задача, не начатая до срока, отбрасывается; начатая - прерывается по сроку
+        if lane not in self.lanes:
+            raise ValueError(f"Неизвестная полоса приоритета: {lane}")
+
+        timeout = self.lanes[lane]['timeout'] if timeout is None else timeout
+        future = Future()
+        job = {
+            'image': image,
+            'lang': lang,
+            'lane': lane,
+            'deadline': time.monotonic() + timeout,
+            'future': future
+        }
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Планировщик OCR остановлен")
+
+            heapq.heappush(self._queue, (self.lanes[lane]['rank'], job['deadline'], next(self._sequence), job))
+            self._counters[lane]['queued'] += 1
+            self._counters[lane]['submitted'] += 1
+            self._condition.notify()
+
+        return future
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+
+                _, deadline, _, job = heapq.heappop(self._queue)
+                counters = self._counters[job['lane']]
+                counters['queued'] -= 1
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    counters['dropped'] += 1
+                    action = 'drop'
+                elif not job['future'].set_running_or_notify_cancel():
+                    counters['cancelled'] += 1
+                    action = 'skip'
+                else:
+                    self._running += 1
+                    action = 'run'
+
+            if action == 'drop':
+                logger.warning(f"Задача OCR ({job['lane']}) отброшена: срок истек в очереди")
+                if job['future'].set_running_or_notify_cancel():
+                    job['future'].set_result(self._error_result(job, 'Срок задачи истек до начала распознавания'))
+            elif action == 'run':
+                self._run_job(job, remaining)
+
+    def _run_job(self, job: Dict[str, Any], timeout: float) -> None:
+        try:
+            result = self._extract(job['image'], job['lang'], timeout)
+        except Exception as e:
+            logger.error(f"Ошибка задачи OCR: {e}")
+            result = self._error_result(job, str(e))
+
+        with self._condition:
+            self._running -= 1
+            counters = self._counters[job['lane']]
+            counters['completed'] += 1
+            if not result['success'] and result['error'] == 'Таймаут':
+                counters['timed_out'] += 1
+
+        job['future'].set_result(result)
+
+    def _extract(self, image: Union[str, bytes, np.ndarray], lang: str, timeout: float) -> Dict[str, Any]:
+        if isinstance(image, np.ndarray):
+            return self.ocr_processor.extract_text_from_array(image, lang, timeout=timeout)
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return self.ocr_processor.extract_text_from_bytes(image, lang, timeout=timeout)
+        return self.ocr_processor.extract_text(str(image), lang, timeout=timeout)
+
+    def _error_result(self, job: Dict[str, Any], error: str) -> Dict[str, Any]:
+        image_path = job['image'] if isinstance(job['image'], str) else None
+        return self.ocr_processor._build_result({'success': False, 'error': error}, job['lang'], image_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            lanes = {lane: dict(counters) for lane, counters in self._counters.items()}
+            return {
+                'workers': self.num_workers,
+                'running': self._running,
+                'queue_depth': len(self._queue),
+                'dropped': sum(counters['dropped'] for counters in lanes.values()),
+                'timed_out': sum(counters['timed_out'] for counters in lanes.values()),
+                'lanes': lanes
+            }
+
+    def close(self, wait: bool = True, cancel_pending: bool = True) -> None:
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                for _, _, _, job in self._queue:
+                    job['future'].cancel()
+                    self._counters[job['lane']]['cancelled'] += 1
+                    self._counters[job['lane']]['queued'] -= 1
+                self._queue.clear()
+            self._condition.notify_all()
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+        logger.info("Планировщик OCR остановлен")
@@ -0,0 +1,108 @@
+import os
+import threading
+import logging
+import weakref
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CPUAllocation:
+    total_cores: int
+    ocr_cores: int
+    ocr_workers: int
+    ocr_threads_per_worker: int
+    inference_threads: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ResourceManager:
+
+    def __init__(self, total_cores: Optional[int] = None, ocr_share: float = 0.5,
+                 ocr_threads_per_worker: int = 1):
+        # total_cores - бюджет ядер на OCR и инференс вместе (по умолчанию все ядра машины)
+        # ocr_share - доля бюджета для Tesseract, остаток получает трансформер
+        # ocr_threads_per_worker - OMP_THREAD_LIMIT каждого процесса tesseract
+        self._lock = threading.Lock()
+        self._ocr_processors = weakref.WeakSet()
+        self._transformers = weakref.WeakSet()
+
+        self.allocation = self._split(total_cores, ocr_share, ocr_threads_per_worker)
+        self.ocr_share = ocr_share
+        # Запрошенное число потоков на процесс: в allocation оно может быть урезано
+        # под текущий бюджет и при его увеличении пересчитывается из запроса
+        self.ocr_threads_per_worker = ocr_threads_per_worker
+
+        logger.info(f"Бюджет CPU: {self.allocation.to_dict()}")
+
+    @staticmethod
+    def _split(total_cores: Optional[int], ocr_share: float, ocr_threads_per_worker: int) -> CPUAllocation:
+        if not 0.0 <= ocr_share <= 1.0:
+            raise ValueError(f"Доля OCR должна быть от 0 до 1: {ocr_share}")
+
+        total = max(1, total_cores or os.cpu_count() or 1)
+        threads_per_worker = max(1, ocr_threads_per_worker)
+
+        if total == 1:
+            # Одно ядро делят обе стороны, иначе одна из них остановится
+            return CPUAllocation(1, 1, 1, 1, 1)
+
+        # Каждой стороне минимум одно ядро
+        ocr_cores = min(total - 1, max(1, round(total * ocr_share)))
+        threads_per_worker = min(threads_per_worker, ocr_cores)
+
+        return CPUAllocation(
+            total_cores=total,
+            ocr_cores=ocr_cores,
+            ocr_workers=max(1, ocr_cores // threads_per_worker),
+            ocr_threads_per_worker=threads_per_worker,
+            inference_threads=total - ocr_cores
+        )
+
+    def register_ocr(self, ocr_processor) -> None:
+        with self._lock:
+            self._ocr_processors.add(ocr_processor)
+            allocation = self.allocation
+        ocr_processor.apply_cpu_allocation(allocation.ocr_workers, allocation.ocr_threads_per_worker)
+
+    def register_transformer(self, transformer_classifier) -> None:
+        with self._lock:
+            self._transformers.add(transformer_classifier)
+            allocation = self.allocation
+        transformer_classifier.set_num_threads(allocation.inference_threads)
+
+    def set_budget(self, total_cores: Optional[int] = None, ocr_share: Optional[float] = None,
+                   ocr_threads_per_worker: Optional[int] = None) -> CPUAllocation:
+        # Пересчет распределения и применение ко всем зарегистрированным компонентам
+        with self._lock:
+            current = self.allocation
+            share = self.ocr_share if ocr_share is None else ocr_share
+            threads_per_worker = ocr_threads_per_worker or self.ocr_threads_per_worker
+            self.allocation = self._split(
+                total_cores or current.total_cores,
+                share,
+                threads_per_worker
+            )
+            self.ocr_share = share
+            self.ocr_threads_per_worker = threads_per_worker
+            allocation = self.allocation
+            ocr_processors = list(self._ocr_processors)
+            transformers = list(self._transformers)
+
+        for ocr_processor in ocr_processors:
+            ocr_processor.apply_cpu_allocation(allocation.ocr_workers, allocation.ocr_threads_per_worker)
+        for transformer_classifier in transformers:
+            transformer_classifier.set_num_threads(allocation.inference_threads)
+
+        logger.info(f"Бюджет CPU изменен: {allocation.to_dict()}")
+        return allocation
+
+    def get_allocation(self) -> Dict[str, Any]:
+        with self._lock:
+            result = self.allocation.to_dict()
+            result['ocr_share'] = self.ocr_share
+            result['ocr_processors'] = len(self._ocr_processors)
+            result['transformers'] = len(self._transformers)
+            return result
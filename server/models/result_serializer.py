@@ -0,0 +1,155 @@
+import math
+import json
+import struct
+import logging
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, TextIO
+
+from activity_classifier import ActivityCategory, ClassificationResult
+
+logger = logging.getLogger(__name__)
+
+# Двоичный формат: заголовок MAGIC + версия, затем записи подряд. Запись:
+# номер категории, уверенности, время (time.time()), подкатегория, тип классификатора,
+# краткое содержание, списки ключевых слов и приложений. Короткие повторяющиеся строки
+# (подкатегории, ключевые слова) записываются один раз и дальше передаются номером
+MAGIC = b'SACR'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sB')
+_RECORD = struct.Struct('<Bdddd')
+_INDEX = struct.Struct('<H')
+_LENGTH = struct.Struct('<I')
+_INLINE = 0xFFFF
+
+_encode_string = json.encoder.encode_basestring
+_CATEGORY_VALUES = [_encode_string(category.value) for category in ActivityCategory]
+
+def _json_float(value: float) -> str:
+    value = float(value)
+    return repr(value) if math.isfinite(value) else json.dumps(value)
+
+def _json_list(values: List[str]) -> str:
+    return '[' + ', '.join(_encode_string(value) for value in values) + ']'
+
+def write_jsonl(results: Iterable[ClassificationResult], file: TextIO) -> int:
+    # Строки JSON в формате ClassificationResult.to_dict без промежуточных словарей.
+    # Возвращает число записанных результатов
+    count = 0
+    for result in results:
+        summary = result.text_summary
+        file.write(
+            f'{{"category": {_CATEGORY_VALUES[result.category_id]}, '
+            f'"subcategory": {_encode_string(result.subcategory)}, '
+            f'"confidence": {_json_float(result.confidence)}, '
+            f'"matched_keywords": {_json_list(result.matched_keywords)}, '
+            f'"detected_apps": {_json_list(result.detected_apps)}, '
+            f'"text_summary": {_encode_string(summary[:200] if summary else "")}, '
+            f'"timestamp": "{datetime.fromtimestamp(result.timestamp_seconds).isoformat()}"}}\n'
+        )
+        count += 1
+    return count
+
+class _StringTable:
+
+    def __init__(self):
+        self.indexes: Dict[str, int] = {}
+
+    def write(self, value: str, chunks: List[bytes]) -> None:
+        index = self.indexes.get(value)
+        if index is not None:
+            chunks.append(_INDEX.pack(index))
+            return
+
+        # Новая строка: номер, который она получит, и сама строка
+        encoded = value.encode('utf-8')
+        if len(self.indexes) < _INLINE:
+            index = len(self.indexes)
+            self.indexes[value] = index
+        else:
+            index = _INLINE
+        chunks.append(_INDEX.pack(index))
+        chunks.append(_LENGTH.pack(len(encoded)))
+        chunks.append(encoded)
+
+def write_binary(results: Iterable[ClassificationResult], file: BinaryIO) -> int:
+    # Возвращает число записанных результатов
+    file.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+    table = _StringTable()
+    count = 0
+
+    for result in results:
+        chunks = [_RECORD.pack(result.category_id, result.confidence, result.transformer_confidence,
+                               result.keyword_confidence, result.timestamp_seconds)]
+        table.write(result.subcategory or '', chunks)
+        table.write(result.classifier_type or '', chunks)
+
+        summary = (result.text_summary or '').encode('utf-8')
+        chunks.append(_LENGTH.pack(len(summary)))
+        chunks.append(summary)
+
+        for values in (result.matched_keywords, result.detected_apps):
+            chunks.append(_INDEX.pack(len(values)))
+            for value in values:
+                table.write(value, chunks)
+
+        file.write(b''.join(chunks))
+        count += 1
+
+    return count
+
+def read_binary(file: BinaryIO) -> Iterator[ClassificationResult]:
+    magic, version = _HEADER.unpack(_read_exact(file, _HEADER.size))
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемый формат результатов: {magic!r}, версия {version}")
+
+    strings: List[str] = []
+
+    def read_string() -> str:
+        index, = _INDEX.unpack(_read_exact(file, _INDEX.size))
+        if index < len(strings):
+            return strings[index]
+        length, = _LENGTH.unpack(_read_exact(file, _LENGTH.size))
+        value = _read_exact(file, length).decode('utf-8')
+        if index != _INLINE:
+            strings.append(value)
+        return value
+
+    while True:
+        record = file.read(_RECORD.size)
+        if not record:
+            return
+        if len(record) < _RECORD.size:
+            raise ValueError("Файл результатов обрезан")
+
+        category_id, confidence, transformer_confidence, keyword_confidence, timestamp = _RECORD.unpack(record)
+        subcategory = read_string()
+        classifier_type = read_string()
+        length, = _LENGTH.unpack(_read_exact(file, _LENGTH.size))
+        text_summary = _read_exact(file, length).decode('utf-8')
+
+        lists = []
+        for _ in range(2):
+            count, = _INDEX.unpack(_read_exact(file, _INDEX.size))
+            lists.append([read_string() for _ in range(count)])
+
+        result = ClassificationResult(
+            category=ActivityCategory.UNKNOWN,
+            subcategory=subcategory,
+            confidence=confidence,
+            matched_keywords=lists[0],
+            detected_apps=lists[1],
+            text_summary=text_summary,
+            timestamp=timestamp,
+            classifier_type=classifier_type,
+            transformer_confidence=transformer_confidence,
+            keyword_confidence=keyword_confidence
+        )
+        result.category_id = category_id
+        yield result
+
+def _read_exact(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("Файл результатов обрезан")
+    return data
@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Any, Union
+
+import numpy as np
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+class TesseractEnginePool:
+
+    def __init__(self, tessdata_path: Union[str, Path], size: Optional[int] = None,
+                 acquire_timeout: float = 30.0):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr не установлен, пул движков Tesseract недоступен")
+
+        self.tessdata_path = str(tessdata_path).rstrip('/\\') + os.sep
+        self.size = size or os.cpu_count() or 1
+        self.acquire_timeout = acquire_timeout
+
+        # Свободные движки для каждой комбинации (язык, OEM, переменные инициализации)
+        self._idle: Dict[Tuple[str, int, frozenset], queue.LifoQueue] = {}
+        self._created: Dict[Tuple[str, int, frozenset], int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        logger.info(f"Пул движков Tesseract: до {self.size} движков на язык, tessdata: {self.tessdata_path}")
+
+    @staticmethod
+    def is_available() -> bool:
+        return tesserocr is not None
+
+    def _create_engine(self, lang: str, oem: int, variables: Dict[str, str]):
+        logger.info(f"Загрузка движка Tesseract (язык: {lang}, OEM: {oem})")
+        # Переменные вроде load_system_dawg действуют только при инициализации движка
+        return tesserocr.PyTessBaseAPI(
+            path=self.tessdata_path,
+            lang=lang,
+            oem=oem,
+            psm=tesserocr.PSM.AUTO,
+            variables=variables
+        )
+
+    @contextmanager
+    def acquire(self, lang: str, oem: int = 3, variables: Optional[Dict[str, str]] = None):
+        if self._closed:
+            raise RuntimeError("Пул движков Tesseract закрыт")
+
+        variables = variables or {}
+        key = (lang, oem, frozenset(variables.items()))
+        create = False
+
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            if idle.empty() and self._created.get(key, 0) < self.size:
+                self._created[key] = self._created.get(key, 0) + 1
+                create = True
+
+        if create:
+            try:
+                engine = self._create_engine(lang, oem, variables)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+        else:
+            try:
+                engine = idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise TimeoutError(f"Нет свободного движка Tesseract за {self.acquire_timeout} с")
+
+        try:
+            yield engine
+        finally:
+            engine.Clear()
+            with self._lock:
+                # После уменьшения пула лишние движки освобождаются при возврате
+                surplus = self._created.get(key, 0) > self.size
+                if surplus:
+                    self._created[key] -= 1
+            if self._closed or surplus:
+                engine.End()
+            else:
+                idle.put(engine)
+
+    def resize(self, size: int) -> None:
+        with self._lock:
+            self.size = max(1, size)
+            for key, idle in self._idle.items():
+                while self._created.get(key, 0) > self.size and not idle.empty():
+                    idle.get_nowait().End()
+                    self._created[key] -= 1
+        logger.info(f"Размер пула движков Tesseract: {self.size}")
+
+    def recognize(self, image: np.ndarray, lang: str, psm: int = 3, oem: int = 3,
+                  variables: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> str:
+        # Возвращает результат в формате TSV, как 'tesseract ... tsv'
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        with self.acquire(lang, oem, variables) as engine:
+            engine.SetPageSegMode(psm)
+            # Передаем буфер массива напрямую, без кодирования в файл
+            engine.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+            # Tesseract сам прерывает распознавание по истечении таймаута (в миллисекундах)
+            if timeout and not engine.Recognize(timeout=max(1, int(timeout * 1000))):
+                raise TimeoutError(f"Распознавание не завершилось за {timeout:.1f} с")
+            return engine.GetTSVText(0)
+
+    @staticmethod
+    def _key_name(key: Tuple[str, int, frozenset]) -> str:
+        lang, oem, variables = key
+        name = f"{lang}/oem{oem}"
+        if variables:
+            name += '/' + ','.join(f"{k}={v}" for k, v in sorted(variables))
+        return name
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': self.size,
+                'engines': {self._key_name(key): count for key, count in self._created.items()},
+                'idle': {self._key_name(key): idle.qsize() for key, idle in self._idle.items()}
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().End()
+            self._idle.clear()
+            self._created.clear()
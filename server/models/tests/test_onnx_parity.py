@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Каталог модели можно переопределить переменной окружения SCREEN_ACTIVITY_MODEL_DIR,
+# граф ONNX ищется там же, куда его по умолчанию сохраняет llm/export_onnx.py
+MODEL_DIR = Path(os.environ.get('SCREEN_ACTIVITY_MODEL_DIR',
+                                Path(__file__).parent.parent / 'llm' / 'trained_model'))
+ONNX_PATH = MODEL_DIR / 'model.onnx'
+DATASET_PATH = Path(__file__).parent.parent / 'llm' / 'dataset' / 'test.json'
+SAMPLES = 16
+
+def _weights_available() -> bool:
+    # В репозитории вместо весов может лежать указатель git-lfs
+    weights = MODEL_DIR / 'pytorch_model.bin'
+    if not (MODEL_DIR / 'config.json').exists() or not weights.exists():
+        return False
+    with open(weights, 'rb') as f:
+        return not f.read(64).startswith(b'version https://git-lfs')
+
+pytestmark = [
+    pytest.mark.skipif(not _weights_available(), reason=f"Нет весов модели в {MODEL_DIR}"),
+    pytest.mark.skipif(not ONNX_PATH.exists(), reason=f"Нет графа ONNX {ONNX_PATH} (llm/export_onnx.py)")
+]
+
+def _is_quantized(onnx_path: Path) -> bool:
+    import onnx
+
+    graph = onnx.load(str(onnx_path), load_external_data=False).graph
+    return any(node.op_type in ('DynamicQuantizeLinear', 'MatMulInteger', 'DynamicQuantizeMatMul')
+               for node in graph.node)
+
+def test_onnx_matches_torch():
+    pytest.importorskip('onnxruntime')
+    from llm.export_onnx import check_parity
+
+    with open(DATASET_PATH, 'r', encoding='utf-8') as f:
+        texts = [sample['text'] for sample in json.load(f)][:SAMPLES]
+
+    parity = check_parity(str(MODEL_DIR), str(ONNX_PATH), texts, batch_size=4)
+
+    if _is_quantized(ONNX_PATH):
+        # Квантованный граф сравнивается только по совпадению категорий
+        assert parity['category_agreement'] >= 0.9, parity
+    else:
+        assert parity['max_logit_diff'] <= 1e-3, parity
+        assert parity['category_agreement'] == 1.0, parity